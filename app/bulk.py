@@ -0,0 +1,122 @@
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import literal, null, select, union_all
+
+from app.db import DBContext
+from app.logger import logger
+from app.models import Actor, Movie
+from app.models.movie__actor import MovieActor
+from app.schemas import ExportedActor, ExportedEdge, ExportedMovie, ExportedRecord
+from app.scraper.schemas import ActorInfo, CrawlResult
+
+# Rows fetched from the server side cursor (and lines sent) at once
+EXPORT_BATCH_SIZE = 1000
+
+# A single statement is a single consistent snapshot,
+# so the export never mixes data from before and after a crawl.
+# SQLite returns the parts of a UNION ALL in order: movies, actors, then edges,
+# which is also the order the import needs them in.
+_EXPORT_STATEMENT = union_all(
+    select(literal("movie"), Movie.id, Movie.title, Movie.rank),
+    select(literal("actor"), Actor.id, Actor.name, null()),
+    select(literal("edge"), MovieActor.movie_id, null(), MovieActor.actor_id),
+).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+_record_adapter = TypeAdapter[ExportedRecord](ExportedRecord)
+
+
+def _encode_line(kind: str, id_: int, name: str | None, number: int | None) -> str:
+    match kind:
+        case "movie":
+            record = {"type": kind, "id": id_, "title": name, "rank": number}
+        case "actor":
+            record = {"type": kind, "id": id_, "name": name}
+        case _:
+            record = {"type": kind, "movie_id": id_, "actor_id": number}
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+async def export_catalogue(db_context: DBContext) -> AsyncIterator[bytes]:
+    """
+    Stream all movies, actors and their associations as NDJSON.
+
+    Every line is one `ExportedRecord`. Rows are read from a server side cursor
+    in batches of `EXPORT_BATCH_SIZE`, so memory use doesn't grow with the catalogue.
+    """
+    # The session is opened here and not taken from a dependency,
+    # because dependencies are closed before a streaming response is sent.
+    async with db_context.get_session() as session:
+        result = await session.stream(_EXPORT_STATEMENT)
+        lines = 0
+        async for rows in result.partitions():
+            lines += len(rows)
+            yield "".join(_encode_line(*row) for row in rows).encode()
+        logger.info("Finished catalogue export", lines=lines)
+
+
+async def _iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    pending = b""
+    async for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            yield line
+    yield pending
+
+
+def _invalid_import(line_number: int, reason: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=f"Invalid import on line {line_number}: {reason}",
+    )
+
+
+async def read_catalogue(chunks: AsyncIterable[bytes]) -> CrawlResult:
+    """
+    Parse an NDJSON catalogue (as produced by `export_catalogue`) into a `CrawlResult`.
+
+    Movies and actors have to be listed before the edges referencing them.
+
+    Raises:
+        HTTPException: 422 if a line is not a valid record, repeats a movie or actor,
+            or references an unknown movie or actor.
+    """
+    result = CrawlResult()
+    movie_indexes: dict[int, int] = {}
+    line_number = 0
+    async for line in _iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            record = _record_adapter.validate_json(line)
+        except ValidationError as e:
+            raise _invalid_import(line_number, str(e)) from e
+
+        match record:
+            case ExportedMovie():
+                if record.id in movie_indexes:
+                    raise _invalid_import(line_number, f"duplicate movie {record.id}")
+                movie_indexes[record.id] = result.add_movie(
+                    record.id, record.title, record.rank
+                )
+            case ExportedActor():
+                if result.actor_index(record.id) is not None:
+                    raise _invalid_import(line_number, f"duplicate actor {record.id}")
+                result.add_actor(ActorInfo(name=record.name, id=record.id))
+            case ExportedEdge():
+                movie_idx = movie_indexes.get(record.movie_id)
+                actor_idx = result.actor_index(record.actor_id)
+                if movie_idx is None or actor_idx is None:
+                    raise _invalid_import(line_number, "edge references unknown id")
+                result.add_edge(movie_idx, actor_idx)
+
+    logger.info(
+        "Parsed catalogue import",
+        movies=len(result.movie_ids),
+        actors=len(result.actor_ids),
+        edges=result.edge_count,
+    )
+    return result
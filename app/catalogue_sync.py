@@ -0,0 +1,156 @@
+import asyncio
+import fcntl
+from collections.abc import Awaitable, Callable, Generator
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import IO
+
+from fastapi import HTTPException, status
+
+from app.db import SQLitePath
+from app.logger import logger
+
+type VersionListener = Callable[[int], Awaitable[None]]
+
+
+class CatalogueSync:
+    """
+    Coordinates crawls and catalogue versions between worker processes.
+
+    When the app runs with several workers (`fastapi run --workers N`), every worker
+    opens the same SQLite file. Only the worker holding an exclusive `flock` on
+    `<db>.lock` is allowed to crawl and write (the leader), the others answer with 409
+    instead of starting a second crawl that would rewrite the same tables.
+
+    After the leader commits a new catalogue (and writes `<db>.snapshot`), it bumps the number stored in
+    `<db>.version`. Every worker polls that file in `watch` and notifies its
+    listeners, so they can drop their caches and refresh their connections.
+
+    For in-memory databases there is nothing to share between processes, so the lock
+    is process local and the version only lives in this object.
+    """
+
+    _lock_path: Path | None
+    _version_path: Path | None
+    _snapshot_path: Path | None
+    _version: int
+    _listeners: list[VersionListener]
+    _leading: bool
+
+    def __init__(self, path_to_sqlite_file: SQLitePath) -> None:
+        if path_to_sqlite_file == ":memory:":
+            self._lock_path = None
+            self._version_path = None
+            self._snapshot_path = None
+        else:
+            self._lock_path = path_to_sqlite_file.with_name(
+                f"{path_to_sqlite_file.name}.lock"
+            )
+            self._version_path = path_to_sqlite_file.with_name(
+                f"{path_to_sqlite_file.name}.version"
+            )
+            self._snapshot_path = path_to_sqlite_file.with_name(
+                f"{path_to_sqlite_file.name}.snapshot"
+            )
+        self._listeners = []
+        self._leading = False
+        self._version = 0
+        self._version = self._read_version()
+
+    @property
+    def version(self) -> int:
+        """The catalogue version this worker has last seen."""
+        return self._version
+
+    @property
+    def snapshot_path(self) -> Path | None:
+        """Where the leader writes the catalogue snapshot, None for in-memory databases."""
+        return self._snapshot_path
+
+    def add_listener(self, listener: VersionListener) -> None:
+        """Register a coroutine called with the new version whenever it changes."""
+        self._listeners.append(listener)
+
+    @contextmanager
+    def leadership(self) -> Generator[None]:
+        """
+        Makes this worker the crawl leader for the duration of the block.
+
+        Raises:
+            HTTPException: 409 if another worker (or request) is already crawling.
+        """
+        if self._leading:
+            raise self._crawl_in_progress()
+
+        lock_file: IO[bytes] | None = None
+        if self._lock_path is not None:
+            lock_file = self._lock_path.open("ab")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                raise self._crawl_in_progress() from None
+
+        self._leading = True
+        logger.info("Acquired crawl leadership", version=self._version)
+        try:
+            yield
+        finally:
+            self._leading = False
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+            logger.info("Released crawl leadership")
+
+    async def publish(self) -> int:
+        """Announce a newly committed catalogue to all workers, including this one."""
+        if not self._leading:
+            msg = "Only the crawl leader can publish a new catalogue version"
+            raise RuntimeError(msg)
+
+        version = max(self._version, self._read_version()) + 1
+        if self._version_path is not None:
+            # Write + rename so that followers never read a half written file
+            tmp_path = self._version_path.with_name(f"{self._version_path.name}.tmp")
+            tmp_path.write_text(str(version))
+            tmp_path.replace(self._version_path)
+        logger.info("Published new catalogue version", version=version)
+        await self._set_version(version)
+        return version
+
+    async def watch(self, interval: float) -> None:
+        """Poll the version file and notify the listeners when another worker bumps it."""
+        if self._version_path is None:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            version = self._read_version()
+            if version != self._version:
+                logger.info(
+                    "Detected new catalogue version",
+                    old_version=self._version,
+                    version=version,
+                )
+                await self._set_version(version)
+
+    async def _set_version(self, version: int) -> None:
+        self._version = version
+        for listener in self._listeners:
+            try:
+                await listener(version)
+            except Exception:  # noqa: BLE001 - one broken cache shouldn't stop the others
+                logger.exception("Catalogue version listener failed", version=version)
+
+    def _read_version(self) -> int:
+        if self._version_path is None:
+            return self._version
+        with suppress(FileNotFoundError, ValueError):
+            return int(self._version_path.read_text().strip() or 0)
+        return 0
+
+    @staticmethod
+    def _crawl_in_progress() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A crawl is already running in another request or worker",
+        )
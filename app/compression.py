@@ -0,0 +1,272 @@
+import gzip
+import importlib
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol, cast
+
+from starlette import status
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.logger import logger
+
+
+class _BrotliCompressor(Protocol):
+    def process(self, data: bytes, /) -> bytes: ...
+    def flush(self) -> bytes: ...
+    def finish(self) -> bytes: ...
+
+
+class _BrotliModule(Protocol):
+    def compress(self, data: bytes, /, *, quality: int) -> bytes: ...
+    def Compressor(self, *, quality: int) -> _BrotliCompressor: ...  # noqa: N802
+
+
+# Brotli is an optional dependency (`uv sync --extra brotli`), without it only gzip is offered
+try:
+    brotli: _BrotliModule | None = cast(
+        "_BrotliModule", importlib.import_module("brotli")
+    )
+except ImportError:
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+type _CacheKey = tuple[str, bytes, str]
+
+
+@dataclass(slots=True, frozen=True)
+class CachedResponse:  # noqa: D101
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+class CompressedResponseCache:
+    """
+    LRU cache of already compressed GET responses, keyed by path, query and encoding.
+
+    Every response only depends on the catalogue, so the whole cache is dropped
+    whenever a new catalogue version is published (see `invalidate`).
+    """
+
+    _max_entries: int
+    _entries: OrderedDict[_CacheKey, CachedResponse]
+    _generation: int
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Incremented on every invalidation, so that stale responses aren't stored."""
+        return self._generation
+
+    def get(self, key: _CacheKey) -> CachedResponse | None:  # noqa: D102
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: _CacheKey, response: CachedResponse, generation: int) -> None:
+        """Store a response, unless the cache was invalidated while it was rendered."""
+        if self._max_entries <= 0 or generation != self._generation:
+            return
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, version: int) -> None:
+        """Drop all cached responses, used as a `CatalogueSync` listener."""
+        logger.debug("Dropping compressed responses", version=version)
+        self._generation += 1
+        self._entries.clear()
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, depending on the `Accept-Encoding` header.
+
+    Responses smaller than `minimum_size` are sent as they are. Complete (non streaming)
+    responses to GET requests are compressed once and then served from `cache`,
+    without calling the app at all. Streaming responses such as `/export`
+    are compressed chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache: CompressedResponseCache,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.cache = cache
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:  # noqa: D102
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        key: _CacheKey | None = None
+        if scope["method"] == "GET":
+            key = (scope["path"], scope["query_string"], encoding)
+            cached = self.cache.get(key)
+            if cached is not None:
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": cached.status,
+                        "headers": cached.headers,
+                    }
+                )
+                await send({"type": "http.response.body", "body": cached.body})
+                return
+
+        responder = _CompressingResponder(self, send, encoding, key)
+        await self.app(scope, receive, responder.send)
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        """Compress a whole body at once."""
+        if encoding == "br" and brotli is not None:
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+def _negotiate(accept_encoding: str) -> str | None:
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        qualities[name.strip()] = quality
+    if brotli is not None and qualities.get("br", 0) > 0:
+        return "br"
+    # `*` only stands for the codings that are not listed, `gzip;q=0, *` still refuses gzip
+    if qualities.get("gzip", qualities.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str, middleware: CompressionMiddleware) -> None:
+        self._brotli = (
+            brotli.Compressor(quality=middleware.brotli_quality)
+            if encoding == "br" and brotli is not None
+            else None
+        )
+        # wbits 16 + MAX_WBITS produces the gzip container instead of raw zlib
+        self._gzip = zlib.compressobj(
+            middleware.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data: bytes, *, finish: bool) -> bytes:
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if finish else self._brotli.flush())
+        out = self._gzip.compress(data)
+        return out + self._gzip.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+class _CompressingResponder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        send: Send,
+        encoding: str,
+        key: _CacheKey | None,
+    ) -> None:
+        self._middleware = middleware
+        self._send = send
+        self._encoding = encoding
+        self._key = key
+        self._generation = middleware.cache.generation
+        self._start: Message | None = None
+        self._stream: _StreamCompressor | None = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until we know whether the body gets compressed
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            self._passthrough = "content-encoding" in headers or not headers.get(
+                "content-type", ""
+            ).startswith(_COMPRESSIBLE_TYPES)
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self._stream is not None:
+            await self._send_chunk(self._stream, body, more_body=more_body)
+            return
+
+        start = self._start
+        if start is None:
+            # The rest of a response that is passed through as it is
+            await self._send(message)
+            return
+        self._start = None
+
+        if self._passthrough or (
+            not more_body and len(body) < self._middleware.minimum_size
+        ):
+            await self._send(start)
+            await self._send(message)
+        elif more_body:
+            self._stream = _StreamCompressor(self._encoding, self._middleware)
+            del self._compressed_headers(start)["content-length"]
+            await self._send(start)
+            await self._send_chunk(self._stream, body, more_body=True)
+        else:
+            compressed = self._middleware.compress(self._encoding, body)
+            self._compressed_headers(start)["content-length"] = str(len(compressed))
+            if self._key is not None and start["status"] == status.HTTP_200_OK:
+                self._middleware.cache.put(
+                    self._key,
+                    CachedResponse(start["status"], start["headers"], compressed),
+                    self._generation,
+                )
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _send_chunk(
+        self, stream: _StreamCompressor, body: bytes, *, more_body: bool
+    ) -> None:
+        await self._send(
+            {
+                "type": "http.response.body",
+                "body": stream.compress(body, finish=not more_body),
+                "more_body": more_body,
+            }
+        )
+
+    def _compressed_headers(self, start: Message) -> MutableHeaders:
+        # MutableHeaders edits the raw header list of the start message in place
+        headers = MutableHeaders(raw=start["headers"])
+        headers["content-encoding"] = self._encoding
+        headers.add_vary_header("Accept-Encoding")
+        return headers
@@ -1,18 +1,23 @@
-from collections.abc import AsyncGenerator
+import asyncio
+from collections.abc import AsyncGenerator, Mapping
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Annotated, Literal
+from typing import Annotated, Any, Literal
 
 from pydantic import AfterValidator
+from sqlalchemy import Connection, Executable, Result, event, func, select
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import StaticPool
 
+from app.instrumentation import install_slow_query_log
 from app.logger import logger
-from app.models import Base
+from app.models import Actor, Base, Movie
+from app.models.movie__actor import MovieActor
 
 
 def validate_sqlite_path(path: Path) -> Path:  # noqa: D103
@@ -35,14 +40,76 @@ SQLitePath = (
 
 
 class DBContext:  # noqa: D101
+    _engine: AsyncEngine
     _session_maker: async_sessionmaker[AsyncSession]
 
     def __init__(
         self,
+        engine: AsyncEngine,
         session_maker: async_sessionmaker[AsyncSession],
     ) -> None:
+        self._engine = engine
         self._session_maker = session_maker
 
+    async def refresh_connections(self) -> None:
+        """
+        Drop the pooled connections, so that new sessions open fresh ones.
+
+        Connections that are currently checked out are left alone
+        and get closed once they are returned.
+        """
+        if isinstance(self._engine.pool, StaticPool):
+            # In-memory database, disposing its only connection would drop all the data
+            return
+        logger.debug("Refreshing database connections")
+        await self._engine.dispose()
+
+    async def preload_tables(self) -> None:
+        """Read every table once, so that its pages are in the OS page cache."""
+        async with self.get_session() as session:
+            # Only the catalogue, the crawl frontier is of no use to the readers
+            for model in (Movie, Actor, MovieActor):
+                table = Base.metadata.tables[model.__tablename__]
+                # Summing the lengths of all columns has to visit every page of the table
+                await session.execute(
+                    select(*(func.sum(func.length(column)) for column in table.columns))
+                )
+                logger.debug("Preloaded table", table=table.name)
+
+    async def execute_parallel(
+        self,
+        *statements: Executable | None,
+        params: Mapping[str, Any] | None = None,
+    ) -> list[Result[Any] | None]:
+        """
+        Run independent read statements at the same time, each in its own session.
+
+        A session (and its connection) can only run one statement at a time,
+        so statements that should really run in parallel need a pooled connection each.
+        The results are buffered, and ORM objects in them are detached from their session.
+        Every statement reads its own snapshot of the database, so if a new catalogue
+        is committed meanwhile, some of them may already see it.
+
+        Statements that are None are skipped, their result is None.
+        The in-memory database only has one connection, there they run one after the other.
+        """
+        if isinstance(self._engine.pool, StaticPool):
+            async with self.get_session() as session:
+                return [
+                    None
+                    if statement is None
+                    else await session.execute(statement, params)
+                    for statement in statements
+                ]
+
+        async def execute(statement: Executable | None) -> Result[Any] | None:
+            if statement is None:
+                return None
+            async with self.get_session() as session:
+                return await session.execute(statement, params)
+
+        return await asyncio.gather(*map(execute, statements))
+
     @asynccontextmanager
     async def get_session(
         self,
@@ -90,28 +157,86 @@ class DBContext:  # noqa: D101
             await session.close()
 
 
+def _make_movie_rank_nullable(connection: Connection) -> None:
+    # Databases created before deep crawls require a rank for every movie.
+    # SQLite can't change a column constraint, so the table is copied into a new one.
+    columns = connection.exec_driver_sql("PRAGMA table_info(movies)").all()
+    if not any(column.name == "rank" and column.notnull for column in columns):
+        return
+    logger.info("Migrating movies table to a nullable rank")
+    movies = Base.metadata.tables[Movie.__tablename__]
+    # Legacy, so that the foreign key of movies__actors keeps pointing to "movies"
+    connection.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+    connection.exec_driver_sql("ALTER TABLE movies RENAME TO movies_before_migration")
+    connection.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+    movies.create(connection)
+    connection.exec_driver_sql(
+        "INSERT INTO movies (id, title, normalized_title, rank) "
+        "SELECT id, title, normalized_title, rank FROM movies_before_migration"
+    )
+    connection.exec_driver_sql("DROP TABLE movies_before_migration")
+
+
+def _create_missing_indexes(connection: Connection) -> None:
+    # `create_all` skips tables that already exist, including their new indexes
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
 async def _create_tables_if_necessary(engine: AsyncEngine) -> None:
     """Create tables in the database."""
     async with engine.begin() as conn:
+        # Every worker runs this on startup. The driver would run each CREATE and ALTER
+        # on its own, so without one write transaction for all of them a worker could
+        # create a table while another one is migrating it. The others wait for the lock.
+        await conn.exec_driver_sql("BEGIN IMMEDIATE")
         logger.debug("Creating database tables")
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_make_movie_rank_nullable)
+        await conn.run_sync(_create_missing_indexes)
         logger.debug("Database tables created")
 
 
+# Large enough for the whole catalogue, the OS only maps what is actually read
+MMAP_SIZE = 256 * 2**20
+
+
+def _configure_connection(dbapi_connection: Any, _connection_record: Any) -> None:  # noqa: ANN401
+    cursor = dbapi_connection.cursor()
+    # WAL lets the other workers keep reading the previous catalogue
+    # while the crawl leader is rewriting the tables
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Reads go through the OS page cache shared by all connections and workers,
+    # instead of each connection filling its own SQLite page cache
+    cursor.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    cursor.close()
+
+
 @asynccontextmanager
 async def create_db_context(
     path_to_sqlite_file: SQLitePath,
+    slow_query_ms: float | None = None,
 ) -> AsyncGenerator[DBContext]:
-    """Create a database context with a SQLite file path."""
+    """
+    Create a database context with a SQLite file path.
+
+    If `slow_query_ms` is set, statements taking longer than that are logged
+    together with their parameters and query plan.
+    """
     path = f"sqlite+aiosqlite:///{path_to_sqlite_file}"
     engine = create_async_engine(
         path,
         echo=False,  # Set True to enable SQLAlchemy logging
     )
+    if path_to_sqlite_file != ":memory:":
+        event.listen(engine.sync_engine, "connect", _configure_connection)
+    if slow_query_ms is not None:
+        install_slow_query_log(engine, slow_query_ms)
     logger.debug("Creating database connection")
     try:
         await _create_tables_if_necessary(engine)
-        yield DBContext(async_sessionmaker(engine))
+        yield DBContext(engine, async_sessionmaker(engine))
     finally:
         logger.debug("Closing database connection")
         await engine.dispose()
@@ -5,7 +5,9 @@ from fastapi import Depends, Request
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.catalogue_sync import CatalogueSync
 from app.db import DBContext
+from app.suggest import CatalogueSuggestions
 
 
 async def db_context(
@@ -21,6 +23,34 @@ async def db_context(
 DBContextDep = Annotated[DBContext, Depends(db_context)]
 
 
+async def catalogue_sync(
+    request: Request,
+) -> CatalogueSync:
+    """Provide the crawl leadership and catalogue version coordinator."""
+    if not isinstance(request.app.state.catalogue_sync, CatalogueSync):
+        msg = (
+            f"CatalogueSync not initialized, {type(request.app.state.catalogue_sync)=}"
+        )
+        raise RuntimeError(msg)  # noqa: TRY004
+    return request.app.state.catalogue_sync
+
+
+CatalogueSyncDep = Annotated[CatalogueSync, Depends(catalogue_sync)]
+
+
+async def suggestions(
+    request: Request,
+) -> CatalogueSuggestions:
+    """Provide the autocomplete indexes of the catalogue."""
+    if not isinstance(request.app.state.suggestions, CatalogueSuggestions):
+        msg = f"CatalogueSuggestions not initialized, {type(request.app.state.suggestions)=}"
+        raise RuntimeError(msg)  # noqa: TRY004
+    return request.app.state.suggestions
+
+
+SuggestionsDep = Annotated[CatalogueSuggestions, Depends(suggestions)]
+
+
 async def session(
     db_context: DBContextDep,
 ) -> AsyncGenerator[AsyncSession]:
@@ -0,0 +1,172 @@
+import cProfile
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.logger import logger
+
+# Everything in here is opt-in (see `app.main`), when disabled none of it is installed.
+
+
+def install_slow_query_log(engine: AsyncEngine, threshold_ms: float) -> None:
+    """
+    Log every statement that takes longer than `threshold_ms`.
+
+    The log contains the statement, its bound parameters and the SQLite query plan.
+    """
+
+    def before_cursor_execute(
+        conn: Connection,
+        _cursor: Any,  # noqa: ANN401
+        _statement: str,
+        _parameters: Any,  # noqa: ANN401
+        _context: Any,  # noqa: ANN401
+        _executemany: bool,  # noqa: FBT001
+    ) -> None:
+        conn.info["query_start"] = time.perf_counter()
+
+    def after_cursor_execute(
+        conn: Connection,
+        _cursor: Any,  # noqa: ANN401
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        _context: Any,  # noqa: ANN401
+        executemany: bool,  # noqa: FBT001
+    ) -> None:
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"]) * 1000
+        if elapsed_ms < threshold_ms:
+            return
+        logger.warning(
+            "Slow query",
+            duration_ms=round(elapsed_ms, 3),
+            statement=statement,
+            parameters="<executemany>" if executemany else parameters,
+            plan=None if executemany else _query_plan(conn, statement, parameters),
+        )
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    logger.info("Slow query log enabled", threshold_ms=threshold_ms)
+
+
+def _query_plan(conn: Connection, statement: str, parameters: Any) -> list[str] | None:  # noqa: ANN401
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        # Rows are (id, parent, notused, detail)
+        return [row[3] for row in cursor.fetchall()]
+    except Exception:  # noqa: BLE001 - the plan is only nice to have
+        logger.exception("Could not explain slow query")
+        return None
+    finally:
+        cursor.close()
+
+
+class RequestContextMiddleware:
+    """
+    Adds a request ID to every log record emitted while handling a request.
+
+    The ID is taken from the `X-Request-ID` header or generated, and returned
+    in the response headers. The duration of every request is logged as well.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:  # noqa: D102
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["x-request-id"] = request_id
+            await send(message)
+
+        with logger.contextualize(
+            request_id=request_id, method=scope["method"], path=scope["path"]
+        ):
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            finally:
+                logger.info(
+                    "Request finished",
+                    status_code=status_code,
+                    duration_ms=round((time.perf_counter() - start) * 1000, 3),
+                )
+
+
+_unsafe_filename_re = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# Same as the flags in `app.main`, `X-Profile: 0` doesn't profile
+_TRUTHY = {"1", "true", "yes"}
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests with cProfile and writes the stats to `profile_dir`.
+
+    Either every request is profiled, or only those sent with an `X-Profile: 1` header.
+    Open the `.prof` files with e.g. `snakeviz` or `python -m pstats`.
+
+    Only one request is profiled at a time. The profile covers everything
+    the event loop runs meanwhile, so concurrent requests show up in it as well.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profile_dir: Path,
+        *,
+        profile_all_requests: bool = False,
+    ) -> None:
+        self.app = app
+        self.profile_dir = profile_dir
+        self.profile_all_requests = profile_all_requests
+        self._profiling = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:  # noqa: D102
+        if (
+            scope["type"] != "http"
+            or self._profiling
+            or not (
+                self.profile_all_requests
+                or Headers(scope=scope).get("x-profile", "").lower() in _TRUTHY
+            )
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        self._profiling = True
+        profile = cProfile.Profile()
+        start = time.time()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profile.disable()
+        finally:
+            self._profiling = False
+
+        path = _unsafe_filename_re.sub("_", scope["path"]).strip("_") or "root"
+        file = self.profile_dir / f"{start:.6f}-{scope['method']}-{path}.prof"
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(file)
+        logger.info("Wrote request profile", file=str(file))
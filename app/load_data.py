@@ -1,29 +1,82 @@
+import sqlite3
+from collections.abc import AsyncIterable
 from typing import Annotated
 
+from fastapi import HTTPException, status
 from httpx import AsyncClient
-from pydantic import Field
+from pydantic import BaseModel, Field
 from sqlalchemy import delete, text
-from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
 
+from app.bulk import read_catalogue
+from app.catalogue_sync import CatalogueSync
 from app.db import DBContext
 from app.logger import logger
 from app.models import Actor, Movie
 from app.models.movie__actor import MovieActor
-from app.scraper import get_top_movies
-from app.scraper.schemas import ActorInfo, MovieInfo
-from app.utils import normalize_text
+from app.scraper import (
+    DEFAULT_DEEP_CRAWL_PAGE_BUDGET,
+    MAX_DEEP_CRAWL_DEPTH,
+    get_top_movies,
+)
+from app.scraper.frontier import CrawlFrontier
+from app.scraper.schemas import CrawlResult
+from app.snapshot import write_snapshot
 
 type PagesToCrawl = Annotated[
     int, Field(ge=1, le=10, description="Number of pages to crawl")
 ]
 
 
-async def _persist_movies_and_actors(
+class CrawlOptions(BaseModel):
+    """How to crawl, passed as query parameters."""
+
+    pages_to_crawl: PagesToCrawl = 1
+    resume: bool = Field(
+        default=False,
+        description="Continue the previous crawl instead of starting over",
+    )
+    deep_crawl_depth: int = Field(
+        default=0,
+        ge=0,
+        le=MAX_DEEP_CRAWL_DEPTH,
+        description="How many actors deep to follow filmographies, 0 to not deep crawl",
+    )
+    deep_crawl_page_budget: int = Field(
+        default=DEFAULT_DEEP_CRAWL_PAGE_BUDGET,
+        ge=1,
+        description="Maximum number of pages a deep crawl visits beyond the top movies",
+    )
+
+
+_INSERT_MOVIES = (
+    "INSERT INTO movies (id, title, normalized_title, rank) VALUES (?, ?, ?, ?)"
+)
+_INSERT_ACTORS = "INSERT INTO actors (id, name, normalized_name) VALUES (?, ?, ?)"
+_INSERT_MOVIES_ACTORS = "INSERT INTO movies__actors (movie_id, actor_id) VALUES (?, ?)"
+
+
+def _insert_crawl_result(session: Session, result: CrawlResult) -> None:
+    # The row generators are handed straight to the driver's executemany,
+    # so no list of per-row dicts (or tuples) is ever built.
+    # sqlite3 accepts any iterable, the DBAPI type stubs only declare Sequence.
+    cursor = session.connection().connection.cursor()
+    try:
+        logger.debug("Inserting movies", count=len(result.movie_ids))
+        cursor.executemany(_INSERT_MOVIES, result.movie_rows())  # pyright: ignore[reportArgumentType]
+        logger.debug("Inserting actors", count=len(result.actor_ids))
+        cursor.executemany(_INSERT_ACTORS, result.actor_rows())  # pyright: ignore[reportArgumentType]
+        logger.debug("Inserting movie - actor associations", count=result.edge_count)
+        cursor.executemany(_INSERT_MOVIES_ACTORS, result.edge_rows())  # pyright: ignore[reportArgumentType]
+    finally:
+        cursor.close()
+
+
+async def persist_movies_and_actors(
     db_context: DBContext,
-    top_movies: list[tuple[MovieInfo, list[ActorInfo]]],
+    result: CrawlResult,
 ) -> None:
-    movies = [movie for movie, _ in top_movies]
-    actors = {actor for _, actors in top_movies for actor in actors}
+    """Replace all movies, actors and their associations with `result`."""
     logger.info("Inserting movies and actors into database")
 
     async with db_context.get_session() as session:
@@ -40,42 +93,7 @@ async def _persist_movies_and_actors(
         await session.execute(text("PRAGMA strict = ON"))
 
         # Insert new data
-        logger.debug("Inserting movies")
-        await session.execute(
-            insert(Movie).values(
-                [
-                    {
-                        "title": movie.title,
-                        "normalized_title": normalize_text(movie.title),
-                        "rank": movie.rank,
-                        "id": movie.id,
-                    }
-                    for movie in movies
-                ]
-            )
-        )
-        logger.debug("Inserting actors")
-        await session.execute(
-            insert(Actor).values(
-                [
-                    {
-                        "name": actor.name,
-                        "normalized_name": normalize_text(actor.name),
-                        "id": actor.id,
-                    }
-                    for actor in actors
-                ]
-            )
-        )
-        await session.execute(
-            insert(MovieActor).values(
-                [
-                    {"movie_id": movie.id, "actor_id": actor.id}
-                    for movie, actors in top_movies
-                    for actor in actors
-                ]
-            )
-        )
+        await session.run_sync(_insert_crawl_result, result)
 
         logger.debug("Finished inserting movies and actors into database, committing")
         await session.commit()
@@ -84,13 +102,65 @@ async def _persist_movies_and_actors(
     logger.info("Finished inserting movies and actors into database")
 
 
+async def _replace_catalogue(
+    db_context: DBContext,
+    catalogue_sync: CatalogueSync,
+    result: CrawlResult,
+) -> None:
+    await persist_movies_and_actors(db_context, result)
+    if catalogue_sync.snapshot_path is not None:
+        write_snapshot(catalogue_sync.snapshot_path, result)
+    await catalogue_sync.publish()
+
+
 async def crawl_top_movies_and_actors(
     client: AsyncClient,
     db_context: DBContext,
-    pages_to_crawl: PagesToCrawl,
+    catalogue_sync: CatalogueSync,
+    options: CrawlOptions,
+) -> None:
+    """
+    Crawl top movies and actors from CSFD, and persist them into the database.
+
+    Only one crawl can run at a time across all workers, the others get a 409.
+    With `resume`, the previous crawl continues from its last checkpoint
+    instead of starting over, retrying only the pages that it didn't finish.
+    """
+    with catalogue_sync.leadership():
+        logger.info("Rebuilding movies cache", **options.model_dump())
+        frontier = CrawlFrontier(db_context)
+        if not options.resume:
+            await frontier.reset()
+        top_movies = await get_top_movies(
+            client,
+            frontier,
+            options.pages_to_crawl,
+            deep_crawl_depth=options.deep_crawl_depth,
+            deep_crawl_page_budget=options.deep_crawl_page_budget,
+        )
+        logger.info("Finished crawling movies")
+        await _replace_catalogue(db_context, catalogue_sync, top_movies)
+        # Nothing left to resume
+        await frontier.reset()
+
+
+async def import_movies_and_actors(
+    db_context: DBContext,
+    catalogue_sync: CatalogueSync,
+    chunks: AsyncIterable[bytes],
 ) -> None:
-    """Crawl top movies and actors from CSFD, and persist them into the database."""
-    logger.info("Rebuilding movies cache")
-    top_movies = await get_top_movies(client, pages_to_crawl)
-    logger.info("Finished crawling movies")
-    await _persist_movies_and_actors(db_context, top_movies)
+    """
+    Replace the catalogue with an NDJSON export (see `app.bulk.export_catalogue`).
+
+    Goes through the same leadership and persistence as a crawl.
+    """
+    with catalogue_sync.leadership():
+        result = await read_catalogue(chunks)
+        try:
+            await _replace_catalogue(db_context, catalogue_sync, result)
+        # The inserts go straight through the driver's cursor, so its error isn't wrapped
+        except sqlite3.IntegrityError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Import violates the catalogue constraints (duplicate ids or edges)",
+            ) from e
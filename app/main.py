@@ -1,29 +1,139 @@
+import asyncio
 import os
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
 
 from fastapi import FastAPI
 from pydantic import RootModel
 
+from app.catalogue_sync import CatalogueSync
+from app.compression import CompressedResponseCache, CompressionMiddleware
 from app.db import SQLitePath, create_db_context
+from app.instrumentation import ProfilingMiddleware, RequestContextMiddleware
 from app.logger import logger
+from app.routers.bulk import router as bulk_router
 from app.routers.crawl import router as crawl_router
+from app.routers.health import router as health_router
 from app.routers.read import router as read_router
+from app.snapshot import CatalogueSnapshot, load_snapshot
+from app.suggest import CatalogueSuggestions
+from app.warmup import warm_up
 
 SQLITE_FILE_PATH_ENV = os.getenv("SQLITE_FILE_PATH") or "./crawled.db"
 SQLITE_FILE_PATH = RootModel[SQLitePath].model_validate(SQLITE_FILE_PATH_ENV).root
 
+# How often (in seconds) each worker checks whether another worker published a new catalogue
+CATALOGUE_POLL_INTERVAL = float(os.getenv("CATALOGUE_POLL_INTERVAL") or "1.0")
+
+# Responses smaller than this (in bytes) are not worth compressing
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE") or "500")
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL") or "6")
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY") or "4")
+# How many compressed GET responses to keep, 0 disables the cache
+COMPRESSED_CACHE_SIZE = int(os.getenv("COMPRESSED_CACHE_SIZE") or "1024")
+
+# Preload the database and replay requests for the hot movies and actors on startup,
+# `/ready` returns 503 until that is done
+WARM_START = (os.getenv("WARM_START") or "").lower() in {"1", "true", "yes"}
+# How many of the best ranked movies (and most prolific actors) to request during warm-up
+WARM_START_REQUESTS = int(os.getenv("WARM_START_REQUESTS") or "100")
+
+# Log statements slower than this many milliseconds, with their parameters and query plan
+SLOW_QUERY_MS = (
+    float(os.environ["SLOW_QUERY_MS"]) if os.getenv("SLOW_QUERY_MS") else None
+)
+# Write cProfile stats of requests sent with an `X-Profile` header into this directory
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+# Profile every request, not only those with the header (requires PROFILE_DIR)
+PROFILE_ALL_REQUESTS = (os.getenv("PROFILE_ALL_REQUESTS") or "").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+# Add a request ID to every log record and log the duration of every request
+REQUEST_LOGGING = (os.getenv("REQUEST_LOGGING") or "").lower() in {"1", "true", "yes"}
+
+compressed_cache = CompressedResponseCache(COMPRESSED_CACHE_SIZE)
+
+
+def _load_snapshot(catalogue_sync: CatalogueSync) -> CatalogueSnapshot | None:
+    if catalogue_sync.snapshot_path is None:
+        return None
+    return load_snapshot(catalogue_sync.snapshot_path)
+
+
+async def _warm_up(app: FastAPI) -> None:
+    try:
+        await warm_up(app, app.state.db, app.state.snapshot, WARM_START_REQUESTS)
+    except Exception:  # noqa: BLE001 - a cold worker is still better than no worker
+        logger.exception("Warm-up failed")
+    finally:
+        app.state.ready = True
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
     """Performs tasks that should be done at the start and end of the application's lifespan."""
     logger.debug("Creating database context")
-    async with create_db_context(SQLITE_FILE_PATH) as db:
+    async with create_db_context(SQLITE_FILE_PATH, SLOW_QUERY_MS) as db:
         app.state.db = db
-        yield
+
+        catalogue_sync = CatalogueSync(SQLITE_FILE_PATH)
+        catalogue_sync.add_listener(lambda _version: db.refresh_connections())
+        catalogue_sync.add_listener(compressed_cache.invalidate)
+        await compressed_cache.invalidate(catalogue_sync.version)
+        app.state.catalogue_sync = catalogue_sync
+
+        app.state.snapshot = _load_snapshot(catalogue_sync)
+
+        async def reload_snapshot(_version: int) -> None:
+            app.state.snapshot = _load_snapshot(catalogue_sync)
+
+        catalogue_sync.add_listener(reload_snapshot)
+
+        # The cache was dropped when the catalogue changed, but until the indexes are rebuilt
+        # `/suggest` still answers from the previous one, so it has to be dropped again
+        suggestions = CatalogueSuggestions(on_rebuilt=compressed_cache.invalidate)
+        app.state.suggestions = suggestions
+        catalogue_sync.add_listener(lambda version: suggestions.rebuild(db, version))
+
+        background_tasks = [
+            asyncio.create_task(catalogue_sync.watch(CATALOGUE_POLL_INTERVAL)),
+            asyncio.create_task(suggestions.rebuild(db, catalogue_sync.version)),
+        ]
+        app.state.ready = not WARM_START
+        if WARM_START:
+            background_tasks.append(asyncio.create_task(_warm_up(app)))
+        try:
+            yield
+        finally:
+            for task in background_tasks:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
 
 
 app = FastAPI(lifespan=lifespan)
 
+app.add_middleware(
+    CompressionMiddleware,
+    cache=compressed_cache,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    gzip_level=GZIP_LEVEL,
+    brotli_quality=BROTLI_QUALITY,
+)
+if PROFILE_DIR:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profile_dir=Path(PROFILE_DIR),
+        profile_all_requests=PROFILE_ALL_REQUESTS,
+    )
+if REQUEST_LOGGING:
+    # Added last so it is the outermost middleware and covers everything else
+    app.add_middleware(RequestContextMiddleware)
+
+app.include_router(health_router)
 app.include_router(read_router)
 app.include_router(crawl_router)
+app.include_router(bulk_router)
@@ -1,5 +1,19 @@
 from .actor import Actor
 from .base import Base
+from .crawl_frontier import (
+    CrawlFrontierCast,
+    CrawlFrontierPage,
+    FrontierState,
+    PageKind,
+)
 from .movie import Movie
 
-__all__ = ["Actor", "Base", "Movie"]
+__all__ = [
+    "Actor",
+    "Base",
+    "CrawlFrontierCast",
+    "CrawlFrontierPage",
+    "FrontierState",
+    "Movie",
+    "PageKind",
+]
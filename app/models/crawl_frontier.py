@@ -0,0 +1,65 @@
+from enum import StrEnum
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class PageKind(StrEnum):
+    """The kinds of pages a crawl visits."""
+
+    LIST = "list"  # a page of the top movies chart
+    MOVIE = "movie"
+    ACTOR = "actor"  # only visited by deep crawls
+
+
+class FrontierState(StrEnum):
+    """Where a page is in the crawl."""
+
+    PENDING = "pending"  # not visited yet
+    FAILED = "failed"  # could not be downloaded
+    FETCHED = "fetched"  # downloaded, but could not be parsed, the page is kept
+    PARSED = "parsed"  # done, its results are stored
+    SKIPPED = "skipped"  # failed too many times, left out of the catalogue
+
+
+class CrawlFrontierPage(Base):
+    """
+    Crawl state of a single page, so that an interrupted crawl can be resumed.
+
+    The frontier only lives until the crawl it belongs to is persisted,
+    a crawl that isn't resumed starts with a new one.
+
+    `depth` is the number of actor pages between the page and the top movies chart,
+    `priority` the number of visited pages linking to it (see `app.scraper.frontier`).
+    """
+
+    __tablename__ = "crawl_frontier"
+
+    url: Mapped[str] = mapped_column(primary_key=True)
+    kind: Mapped[str]
+    state: Mapped[str] = mapped_column(index=True)
+    depth: Mapped[int] = mapped_column(default=0)
+    priority: Mapped[int] = mapped_column(default=0)
+    attempts: Mapped[int] = mapped_column(default=0)
+    error: Mapped[str | None] = mapped_column(default=None)
+    # zlib compressed page, only kept while the page is FETCHED
+    content: Mapped[bytes | None] = mapped_column(default=None)
+
+    # Only set for movie pages
+    movie_id: Mapped[int | None] = mapped_column(default=None)
+    title: Mapped[str | None] = mapped_column(default=None)
+    rank: Mapped[int | None] = mapped_column(default=None)
+
+    # Only set for actor pages
+    actor_id: Mapped[int | None] = mapped_column(default=None)
+
+
+class CrawlFrontierCast(Base):
+    """Actors parsed from the movie pages of the crawl frontier."""
+
+    __tablename__ = "crawl_frontier_cast"
+
+    movie_id: Mapped[int] = mapped_column(primary_key=True)
+    actor_id: Mapped[int] = mapped_column(primary_key=True)
+    actor_name: Mapped[str]
@@ -34,8 +34,9 @@ class Movie(Base):
     #      (or even something like elasticsearch, but that is an overkill for this app)
     normalized_title: Mapped[str]
 
-    # so we have something else to store other than the title
-    rank: Mapped[int] = mapped_column()
+    # so we have something else to store other than the title,
+    # only movies from the top movies chart have one, not those found by a deep crawl
+    rank: Mapped[int | None] = mapped_column()
 
     actors: Mapped[list["Actor"]] = relationship(
         secondary=MovieActor.__table__,
@@ -16,4 +16,6 @@ class MovieActor(Base):
     actor_id: Mapped[int] = mapped_column(
         ForeignKey("actors.id"),
         primary_key=True,
+        # The primary key only helps looking up by movie, this is for the other way around
+        index=True,
     )
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app.bulk import export_catalogue
+from app.dependencies import CatalogueSyncDep, DBContextDep
+from app.load_data import import_movies_and_actors
+
+router = APIRouter(prefix="", tags=["Bulk"])
+
+NDJSON = "application/x-ndjson"
+
+
+@router.get(
+    "/export",
+    summary="Export the whole catalogue as NDJSON",
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON: {}}}},
+)
+async def export(db_context: DBContextDep) -> StreamingResponse:
+    """
+    Streams all movies, then all actors, then all movie - actor pairs, one JSON object per line
+
+    Every object has a `type` field, which is one of `movie`, `actor` or `edge`.
+    """
+    return StreamingResponse(export_catalogue(db_context), media_type=NDJSON)
+
+
+@router.post(
+    "/import",
+    summary="Replace the whole catalogue with an NDJSON export",
+    status_code=204,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON: {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def import_(
+    request: Request,
+    db_context: DBContextDep,
+    catalogue_sync: CatalogueSyncDep,
+) -> None:
+    """
+    Loads a stream in the format produced by `/export`, replacing the current data
+
+    Returns 409 if a crawl or another import is running, possibly in another worker.
+    """
+    await import_movies_and_actors(db_context, catalogue_sync, request.stream())
@@ -1,7 +1,9 @@
-from fastapi import APIRouter
+from typing import Annotated
 
-from app.dependencies import DBContextDep, HttpxClientDep
-from app.load_data import PagesToCrawl, crawl_top_movies_and_actors
+from fastapi import APIRouter, Query
+
+from app.dependencies import CatalogueSyncDep, DBContextDep, HttpxClientDep
+from app.load_data import CrawlOptions, crawl_top_movies_and_actors
 
 router = APIRouter(prefix="/crawl", tags=["Crawl"])
 
@@ -13,8 +15,18 @@ router = APIRouter(prefix="/crawl", tags=["Crawl"])
 )
 async def load_movies_data(
     db_context: DBContextDep,
+    catalogue_sync: CatalogueSyncDep,
     httpx_client: HttpxClientDep,
-    pages_to_crawl: PagesToCrawl = 1,
+    options: Annotated[CrawlOptions, Query()],
 ) -> None:
-    """Rebuilds our cache of the most popular movies and actors on ČSFD"""
-    await crawl_top_movies_and_actors(httpx_client, db_context, pages_to_crawl)
+    """
+    Rebuilds our cache of the most popular movies and actors on ČSFD
+
+    Returns 409 if a crawl is already running, possibly in another worker.
+    Returns 503 if some pages could not be crawled, the catalogue is left as it was.
+    Crawling again with `resume=true` retries just those pages.
+
+    With `deep_crawl_depth`, the crawl also follows the actors to their filmographies,
+    visiting at most `deep_crawl_page_budget` more pages.
+    """
+    await crawl_top_movies_and_actors(httpx_client, db_context, catalogue_sync, options)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+router = APIRouter(prefix="", tags=["Health"])
+
+
+@router.get(
+    "/ready",
+    summary="Whether the worker is warmed up",
+    status_code=200,
+)
+async def ready(request: Request) -> None:
+    """Returns 200 once the worker is ready to serve traffic fast, 503 until then"""
+    if not request.app.state.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Warming up"
+        )
@@ -1,17 +1,27 @@
-import asyncio
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, HTTPException, Path
-from pydantic import AfterValidator, Field
-from sqlalchemy import bindparam, select
-from sqlalchemy.orm import selectinload
+from fastapi import APIRouter, HTTPException, Path, Query
+from pydantic import AfterValidator, BeforeValidator, Field
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    bindparam,
+    func,
+    null,
+    select,
+    type_coerce,
+)
+from sqlalchemy.orm import load_only, selectinload
 
-from app.dependencies import SessionDep
+from app.dependencies import DBContextDep, SessionDep, SuggestionsDep
 from app.models import Actor as ActorModel
 from app.models import Movie as MovieModel
+from app.models.movie__actor import MovieActor
 from app.schemas import Actor as ActorSchema
 from app.schemas import ActorWithMovies, MoviesAndActors, MovieWithActors
 from app.schemas import Movie as MovieSchema
+from app.scraper.schemas import UNRANKED
+from app.suggest import MAX_SUGGESTIONS
 from app.utils import normalize_text
 
 router = APIRouter(prefix="", tags=["Read"])
@@ -21,81 +31,233 @@ NormalizedSearchQuery = Annotated[
 ]
 
 
+def _split_commas(value: object) -> object:
+    # Accepts both `include=a,b` and `include=a&include=b`, and `include=` for nothing
+    if not isinstance(value, list | tuple | set | frozenset):
+        return value
+    return [
+        part.strip()
+        for item in value  # pyright: ignore[reportUnknownVariableType]
+        for part in str(item).split(",")  # pyright: ignore[reportUnknownArgumentType]
+        if part.strip()
+    ]
+
+
+type MovieInclude = Literal["actors", "actors.count"]
+type ActorInclude = Literal["movies", "movies.count"]
+type SearchInclude = Literal[
+    "movies", "actors", "movies.actors.count", "actors.movies.count"
+]
+
+MovieIncludes = Annotated[
+    frozenset[MovieInclude],
+    BeforeValidator(_split_commas),
+    Query(description="Comma separated parts of the response to include"),
+]
+ActorIncludes = Annotated[
+    frozenset[ActorInclude],
+    BeforeValidator(_split_commas),
+    Query(description="Comma separated parts of the response to include"),
+]
+SearchIncludes = Annotated[
+    frozenset[SearchInclude],
+    BeforeValidator(_split_commas),
+    Query(description="Comma separated parts of the response to include"),
+]
+
+# Only the columns the responses are made of, not the normalized search columns
+_MOVIE_COLUMNS = load_only(MovieModel.id, MovieModel.title, MovieModel.rank)
+_ACTOR_COLUMNS = load_only(ActorModel.id, ActorModel.name)
+
+
+def _actor_count(*, wanted: bool) -> ColumnElement[int]:
+    """Number of actors of the selected movie, or NULL if it isn't `wanted`."""
+    if not wanted:
+        return type_coerce(null(), Integer)
+    # Correlated, so the count is part of the same statement as the movie,
+    # and it is answered from the primary key of movies__actors alone
+    return (
+        select(func.count())
+        .where(MovieActor.movie_id == MovieModel.id)
+        .correlate(MovieModel)
+        .scalar_subquery()
+    )
+
+
+def _movie_count(*, wanted: bool) -> ColumnElement[int]:
+    """Number of movies of the selected actor, or NULL if it isn't `wanted`."""
+    if not wanted:
+        return type_coerce(null(), Integer)
+    # Answered from the index on movies__actors.actor_id alone
+    return (
+        select(func.count())
+        .where(MovieActor.actor_id == ActorModel.id)
+        .correlate(ActorModel)
+        .scalar_subquery()
+    )
+
+
+def _movie(movie: MovieModel, actor_count: int | None) -> MovieSchema:
+    schema = MovieSchema.from_model(movie)
+    if actor_count is not None:
+        schema.actor_count = actor_count
+    return schema
+
+
+def _actor(actor: ActorModel, movie_count: int | None) -> ActorSchema:
+    schema = ActorSchema.from_model(actor)
+    if movie_count is not None:
+        schema.movie_count = movie_count
+    return schema
+
+
 @router.get(
     "/search",
     summary="Search for movies and actors",
     status_code=200,
+    response_model_exclude_unset=True,
 )
 async def search(
-    session: SessionDep,
+    db_context: DBContextDep,
     query: NormalizedSearchQuery,
+    include: SearchIncludes = frozenset({"movies", "actors"}),
 ) -> MoviesAndActors:
-    """Search for movies and actors"""
+    """
+    Search for movies and actors
+
+    `include` selects what to return: `movies`, `actors`,
+    and the number of actors of every movie (`movies.actors.count`)
+    or movies of every actor (`actors.movies.count`).
+    """
     params = {"pattern": f"%{query}%"}
+    with_movies = not include.isdisjoint({"movies", "movies.actors.count"})
+    with_actors = not include.isdisjoint({"actors", "actors.movies.count"})
 
-    actors_stmt = select(ActorModel).where(
-        ActorModel.normalized_name.ilike(bindparam("pattern"))
+    actors_stmt = (
+        select(ActorModel, _movie_count(wanted="actors.movies.count" in include))
+        .options(_ACTOR_COLUMNS)
+        .where(ActorModel.normalized_name.ilike(bindparam("pattern")))
     )
-    movies_stmt = select(MovieModel).where(
-        MovieModel.normalized_title.ilike(bindparam("pattern"))
+    movies_stmt = (
+        select(MovieModel, _actor_count(wanted="movies.actors.count" in include))
+        .options(_MOVIE_COLUMNS)
+        .where(MovieModel.normalized_title.ilike(bindparam("pattern")))
     )
 
-    actors, movies = await asyncio.gather(
-        session.execute(actors_stmt, params),
-        session.execute(movies_stmt, params),
+    # Both are full scans, so they run on separate connections in parallel
+    movies, actors = await db_context.execute_parallel(
+        movies_stmt if with_movies else None,
+        actors_stmt if with_actors else None,
+        params=params,
     )
-    actors = actors.scalars().all()
-    movies = movies.scalars().all()
 
-    return MoviesAndActors(
-        movies=[MovieSchema.from_model(movie) for movie in movies],
-        actors=[ActorSchema.from_model(actor) for actor in actors],
-    )
+    result = MoviesAndActors()
+    if movies is not None:
+        result.movies = [_movie(movie, count) for movie, count in movies.tuples()]
+    if actors is not None:
+        result.actors = [_actor(actor, count) for actor, count in actors.tuples()]
+    return result
 
 
 @router.get(
     "/movie/{movie_id}",
     summary="Get a movie by ID",
     status_code=200,
+    response_model_exclude_unset=True,
 )
 async def get_movie(
-    session: SessionDep, movie_id: Annotated[int, Path()]
+    session: SessionDep,
+    movie_id: Annotated[int, Path()],
+    include: MovieIncludes = frozenset({"actors"}),
 ) -> MovieWithActors:
-    """Get a movie by ID"""
+    """
+    Get a movie by ID
+
+    `include` selects what to return besides the movie:
+    its `actors`, or just their number (`actors.count`).
+    """
     stmt = (
-        select(MovieModel)
-        .options(selectinload(MovieModel.actors))
+        select(MovieModel, _actor_count(wanted="actors.count" in include))
+        .options(_MOVIE_COLUMNS)
         .where(MovieModel.id == movie_id)
     )
-    movie = await session.execute(stmt)
-    movie = movie.scalar_one_or_none()
-    if not movie:
+    if "actors" in include:
+        stmt = stmt.options(selectinload(MovieModel.actors).options(_ACTOR_COLUMNS))
+    row = (await session.execute(stmt)).tuples().one_or_none()
+    if not row:
         raise HTTPException(status_code=404, detail="Movie not found")
-    return MovieWithActors(
-        movie=MovieSchema.from_model(movie),
-        actors=[ActorSchema.from_model(actor) for actor in movie.actors],
-    )
+
+    movie, actor_count = row
+    result = MovieWithActors(movie=_movie(movie, actor_count))
+    if "actors" in include:
+        result.actors = [ActorSchema.from_model(actor) for actor in movie.actors]
+    return result
 
 
 @router.get(
     "/actor/{actor_id}",
     summary="Get an actor by ID",
     status_code=200,
+    response_model_exclude_unset=True,
 )
 async def get_actor(
-    session: SessionDep, actor_id: Annotated[int, Path()]
+    session: SessionDep,
+    actor_id: Annotated[int, Path()],
+    include: ActorIncludes = frozenset({"movies"}),
 ) -> ActorWithMovies:
-    """Get an actor by ID"""
+    """
+    Get an actor by ID
+
+    `include` selects what to return besides the actor:
+    the `movies` they starred in, or just their number (`movies.count`).
+    """
     stmt = (
-        select(ActorModel)
-        .options(selectinload(ActorModel.stared_in))
+        select(ActorModel, _movie_count(wanted="movies.count" in include))
+        .options(_ACTOR_COLUMNS)
         .where(ActorModel.id == actor_id)
     )
-    actor = await session.execute(stmt)
-    actor = actor.scalar_one_or_none()
-    if not actor:
+    if "movies" in include:
+        stmt = stmt.options(selectinload(ActorModel.stared_in).options(_MOVIE_COLUMNS))
+    row = (await session.execute(stmt)).tuples().one_or_none()
+    if not row:
         raise HTTPException(status_code=404, detail="Actor not found")
-    return ActorWithMovies(
-        actor=ActorSchema.from_model(actor),
-        movies=[MovieSchema.from_model(movie) for movie in actor.stared_in],
+
+    actor, movie_count = row
+    result = ActorWithMovies(actor=_actor(actor, movie_count))
+    if "movies" in include:
+        result.movies = [MovieSchema.from_model(movie) for movie in actor.stared_in]
+    return result
+
+
+@router.get(
+    "/suggest",
+    summary="Autocomplete movie titles and actor names",
+    status_code=200,
+    response_model_exclude_unset=True,
+)
+async def suggest(
+    suggestions: SuggestionsDep,
+    q: Annotated[str, Query(description="What has been typed so far", min_length=1)],
+    limit: Annotated[int, Query(ge=1, le=MAX_SUGGESTIONS)] = 10,
+) -> MoviesAndActors:
+    """
+    Suggest the best ranked movies and the actors with the most movies whose name starts with `q`
+
+    Up to `limit` of each. Accents and letter case don't matter,
+    and if there aren't enough matches, names one typo away are suggested as well.
+    Unlike `/search`, this doesn't query the database, so it is cheap enough for every keystroke.
+    """
+    return MoviesAndActors(
+        movies=[
+            MovieSchema(
+                title=movie.name,
+                rank=None if movie.score == UNRANKED else movie.score,
+                id=movie.id,
+            )
+            for movie in suggestions.movies.suggest(q, limit)
+        ],
+        actors=[
+            ActorSchema(name=actor.name, id=actor.id)
+            for actor in suggestions.actors.suggest(q, limit)
+        ],
     )
@@ -1,15 +1,19 @@
-from typing import Self
+from typing import Annotated, Literal, Self
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.models import Actor as ActorModel
 from app.models import Movie as MovieModel
 
+# The read endpoints only return the fields that were set (see `include` in `app.routers.read`),
+# so the optional relations and counts are left out unless they were asked for.
+
 
 class Movie(BaseModel):  # noqa: D101
     title: str
-    rank: int
+    rank: int | None
     id: int
+    actor_count: int | None = None
 
     @classmethod
     def from_model(cls, model: MovieModel) -> Self:  # noqa: D102
@@ -23,6 +27,7 @@ class Movie(BaseModel):  # noqa: D101
 class Actor(BaseModel):  # noqa: D101
     name: str
     id: int
+    movie_count: int | None = None
 
     @classmethod
     def from_model(cls, model: ActorModel) -> Self:  # noqa: D102
@@ -34,14 +39,39 @@ class Actor(BaseModel):  # noqa: D101
 
 class ActorWithMovies(BaseModel):  # noqa: D101
     actor: Actor
-    movies: list[Movie]
+    movies: list[Movie] = Field(default_factory=list[Movie])
 
 
 class MovieWithActors(BaseModel):  # noqa: D101
     movie: Movie
-    actors: list[Actor]
+    actors: list[Actor] = Field(default_factory=list[Actor])
 
 
 class MoviesAndActors(BaseModel):  # noqa: D101
-    movies: list[Movie]
-    actors: list[Actor]
+    movies: list[Movie] = Field(default_factory=list[Movie])
+    actors: list[Actor] = Field(default_factory=list[Actor])
+
+
+class ExportedMovie(BaseModel):  # noqa: D101
+    type: Literal["movie"] = "movie"
+    id: int
+    title: str
+    rank: int | None
+
+
+class ExportedActor(BaseModel):  # noqa: D101
+    type: Literal["actor"] = "actor"
+    id: int
+    name: str
+
+
+class ExportedEdge(BaseModel):  # noqa: D101
+    type: Literal["edge"] = "edge"
+    movie_id: int
+    actor_id: int
+
+
+# A single line of the NDJSON catalogue export
+ExportedRecord = Annotated[
+    ExportedMovie | ExportedActor | ExportedEdge, Field(discriminator="type")
+]
@@ -1,13 +1,19 @@
 import asyncio
+from collections.abc import Callable
 
 import httpx
-from fastapi import HTTPException
+import tenacity
+from fastapi import HTTPException, status
 
 from app.logger import logger
-from app.scraper.movie_page import find_actors_in_movie_page
+from app.models import CrawlFrontierPage, FrontierState, PageKind
 
-from .list_of_movies import crawl_top_movies_producer
-from .schemas import ActorInfo, MovieInfo
+from ._query_site import load_page
+from .actor_page import parse_filmography
+from .frontier import CrawlFrontier, actor_frontier_page, movie_frontier_page
+from .list_of_movies import parse_top_movies_page, top_movies_page_url
+from .movie_page import BASE_URL, extract_actors_from_page
+from .schemas import CrawlResult
 
 # Heuristic value, with more, the BS4 parser was exhausting my CPU which lead to dropped requests
 MAX_CONCURRENT_REQUESTS = 15
@@ -15,34 +21,206 @@ MAX_CONCURRENT_REQUESTS = 15
 # CSFD only offers up to 10 pages (1-1000) of top movies
 MAX_PAGES = 10
 
+# Beyond that, a deep crawl follows the actors of the top movies to their filmographies,
+# and the actors of those movies to theirs, and so on
+MAX_DEEP_CRAWL_DEPTH = 3
+DEFAULT_DEEP_CRAWL_PAGE_BUDGET = 1000
+
+
+async def _visit[T](
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    frontier: CrawlFrontier,
+    page: CrawlFrontierPage,
+    parse: Callable[[bytes], T],
+) -> T | None:
+    """Download (unless a previous attempt kept it) and parse a page, recording failures."""
+    async with semaphore:
+        content = frontier.content(page)
+        if content is None:
+            try:
+                content = await load_page(client, page.url)
+            except (HTTPException, httpx.HTTPError, tenacity.RetryError) as e:
+                await frontier.failed(page, e)
+                return None
+        # Part of the semaphore so we don't overload the client
+        # which can cause the requests to timeout
+        # because BS4 is not exactly fast.
+        try:
+            return parse(content)
+        # Whatever the markup breaks in the parser (or bs4), only this page is affected
+        except Exception as e:  # noqa: BLE001
+            await frontier.parse_failed(page, content, e)
+            return None
+
+
+async def _crawl_list_page(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    frontier: CrawlFrontier,
+    page: CrawlFrontierPage,
+) -> None:
+    with logger.contextualize(scope="crawl_top_movies", url=page.url):
+        logger.info("Crawling top movies page")
+        movies = await _visit(client, semaphore, frontier, page, parse_top_movies_page)
+        if movies is None:
+            return
+        logger.trace("Parsed top movies", found_movies=len(movies))
+        await frontier.parsed(
+            page, discovered=(movie_frontier_page(movie, BASE_URL) for movie in movies)
+        )
+
+
+async def _crawl_movie_page(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    frontier: CrawlFrontier,
+    page: CrawlFrontierPage,
+    max_depth: int,
+) -> None:
+    with logger.contextualize(scope="crawl_actors", movie_url=page.url):
+        logger.trace("Crawling actors")
+        actors = await _visit(
+            client, semaphore, frontier, page, extract_actors_from_page
+        )
+        if actors is None:
+            return
+        logger.debug("Parsed actors", count=len(actors))
+        actor_pages = (
+            actor_frontier_page(actor, BASE_URL, depth=page.depth + 1)
+            for actor in actors
+            if page.depth < max_depth
+        )
+        await frontier.parsed(
+            page,
+            cast=actors,
+            discovered=(actor_page for actor_page in actor_pages if actor_page),
+        )
+
+
+async def _crawl_actor_page(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    frontier: CrawlFrontier,
+    page: CrawlFrontierPage,
+) -> None:
+    with logger.contextualize(scope="crawl_filmography", actor_url=page.url):
+        logger.trace("Crawling filmography")
+        movies = await _visit(client, semaphore, frontier, page, parse_filmography)
+        if movies is None:
+            return
+        logger.debug("Parsed filmography", count=len(movies))
+        await frontier.parsed(
+            page,
+            discovered=(
+                movie_frontier_page(movie, BASE_URL, depth=page.depth, priority=1)
+                for movie in movies
+            ),
+        )
+
+
+async def _deep_crawl(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    frontier: CrawlFrontier,
+    max_depth: int,
+    page_budget: int,
+) -> None:
+    # Level by level: the actors found at a depth, then the movies in their filmographies.
+    # Within a level the most linked pages go first, both into the budget
+    # and through the semaphore, which admits waiting tasks first come, first served.
+    for depth in range(1, max_depth + 1):
+        for kind in (PageKind.ACTOR, PageKind.MOVIE):
+            pages = await frontier.schedule(kind, depth, page_budget)
+            logger.info("Deep crawl level", depth=depth, kind=kind, pages=len(pages))
+            async with asyncio.TaskGroup() as tasks:
+                for page in pages:
+                    tasks.create_task(
+                        _crawl_actor_page(client, semaphore, frontier, page)
+                        if kind == PageKind.ACTOR
+                        else _crawl_movie_page(
+                            client, semaphore, frontier, page, max_depth
+                        )
+                    )
+            await frontier.drop_pending(kind, depth)
+
 
 async def get_top_movies(
     client: httpx.AsyncClient,
+    frontier: CrawlFrontier,
     pages: int = 1,
-) -> list[tuple[MovieInfo, list[ActorInfo]]]:
-    """Get the top movies from ČSFD."""
+    *,
+    deep_crawl_depth: int = 0,
+    deep_crawl_page_budget: int = DEFAULT_DEEP_CRAWL_PAGE_BUDGET,
+) -> CrawlResult:
+    """
+    Get the top movies from ČSFD.
+
+    The progress is kept in `frontier`, pages it already parsed are not crawled again.
+    A page that fails doesn't stop the rest of the crawl, but if any page is left
+    unfinished, a 503 is raised once all the others are done,
+    and crawling with the same frontier again retries just those.
+
+    With a `deep_crawl_depth`, the crawl goes on to the pages of the actors,
+    the movies they played in, their actors, and so on, that many actors deep.
+    It visits at most `deep_crawl_page_budget` pages beyond the top movies,
+    preferring the actors and movies linked from the most visited pages.
+    """
     if pages > MAX_PAGES:
         msg = f"CSFD only offers up to 10 pages (1-1000) of top movies, but you requested {pages}"
         raise HTTPException(status_code=400, detail=msg)
+    if deep_crawl_depth > MAX_DEEP_CRAWL_DEPTH:
+        msg = f"Deep crawls go up to {MAX_DEEP_CRAWL_DEPTH} actors deep, but you requested {deep_crawl_depth}"
+        raise HTTPException(status_code=400, detail=msg)
 
-    rate_limiter_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-    movie_pages = await asyncio.gather(
-        *[
-            crawl_top_movies_producer(client, rate_limiter_semaphore, page)
-            for page in range(1, pages + 1)
-        ]
-    )
-    logger.info("Finished crawling list of top movies")
-    movies = [movie for page in movie_pages for movie in page]
-    actors = await asyncio.gather(
-        *(
-            find_actors_in_movie_page(client, rate_limiter_semaphore, movie)
-            for movie in movies
+    frontier.add(
+        CrawlFrontierPage(
+            url=top_movies_page_url(page),
+            kind=PageKind.LIST,
+            state=FrontierState.PENDING,
         )
+        for page in range(1, pages + 1)
     )
+    rate_limiter_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    try:
+        # Task groups rather than `gather`, if a page raises, the other pages are
+        # cancelled before the crawl returns, so none of them writes to the frontier
+        # once it is released to the next crawl
+        async with asyncio.TaskGroup() as tasks:
+            for page in await frontier.unfinished(PageKind.LIST):
+                tasks.create_task(
+                    _crawl_list_page(client, rate_limiter_semaphore, frontier, page)
+                )
+        logger.info("Finished crawling list of top movies")
+        async with asyncio.TaskGroup() as tasks:
+            for page in await frontier.unfinished(PageKind.MOVIE):
+                tasks.create_task(
+                    _crawl_movie_page(
+                        client, rate_limiter_semaphore, frontier, page, deep_crawl_depth
+                    )
+                )
+        if deep_crawl_depth:
+            await _deep_crawl(
+                client,
+                rate_limiter_semaphore,
+                frontier,
+                deep_crawl_depth,
+                deep_crawl_page_budget,
+            )
+    finally:
+        # Whatever happened, keep the progress since the last checkpoint
+        await frontier.checkpoint()
+
+    if unfinished := await frontier.unfinished_count():
+        logger.error("Crawl left pages unfinished", unfinished=unfinished)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{unfinished} pages could not be crawled, resume the crawl to retry them",
+        )
 
+    result = await frontier.crawl_result()
     logger.info(
         "Loaded actors for all movies",
-        unique_actor_count=len({actor for batch in actors for actor in batch}),
+        unique_actor_count=len(result.actor_ids),
     )
-    return [(movie, actors) for movie, actors in zip(movies, actors, strict=True)]
+    return result
@@ -0,0 +1,13 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+
+def parse_html(content: bytes) -> "BeautifulSoup":
+    """Parse a downloaded page."""
+    # Imported on the first page rather than with the app,
+    # bs4 is slow to import and only the crawl needs it
+    from bs4 import BeautifulSoup  # noqa: PLC0415
+
+    return BeautifulSoup(content, "html.parser")
@@ -0,0 +1,43 @@
+import re
+
+from app.logger import logger
+
+from ._soup import parse_html
+from .list_of_movies import id_in_url_re
+from .schemas import MovieInfo
+
+# Headers of the filmography sections listing the roles of an actor,
+# as opposed to e.g. "Režie" or "Scénář"
+ACTING_SECTIONS = ("Herec", "Herečka")
+
+# Episodes are linked as /film/<series>/<episode>/
+episode_re = re.compile(r"/film/\d+-[^/]*/\d+-")
+
+
+def parse_filmography(content: bytes) -> list[MovieInfo]:
+    """Parse the movies an actor played in from their page."""
+    soup = parse_html(content)
+    movies: dict[int, MovieInfo] = {}
+    for section in soup.select("section"):
+        header = section.find(["h2", "h3"])
+        if header is None or not header.get_text(strip=True).startswith(
+            ACTING_SECTIONS
+        ):
+            continue
+
+        for a in section.select("a.film-title-name"):
+            url = str(a.get("href", ""))
+            if episode_re.match(url):
+                continue
+            id_match = id_in_url_re.search(url)
+            if id_match is None:
+                msg = f"Could not parse filmography, expected id in url, got {url=}"
+                raise ValueError(msg)
+            id_ = int(id_match.group(1))
+            movies.setdefault(
+                id_,
+                MovieInfo(title=a.get_text(strip=True), url=url, rank=None, id=id_),
+            )
+
+    logger.trace("Parsed filmography", found_movies=len(movies))
+    return list(movies.values())
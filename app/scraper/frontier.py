@@ -0,0 +1,446 @@
+import asyncio
+import re
+import zlib
+from collections.abc import Iterable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db import DBContext
+from app.logger import logger
+from app.models import (
+    Base,
+    CrawlFrontierCast,
+    CrawlFrontierPage,
+    FrontierState,
+    PageKind,
+)
+
+from .schemas import ActorInfo, CrawlResult, MovieInfo
+
+# How many visited pages are buffered before their state is written to the database,
+# a crash loses at most this much work
+CHECKPOINT_EVERY = 50
+# Newly discovered pages buffered before a checkpoint is forced,
+# a single actor filmography can link hundreds of movies
+MAX_BUFFERED_DISCOVERIES = 10_000
+# Crawls that may fail on a page before it is skipped, so that e.g. a removed movie
+# doesn't keep every crawl from replacing the catalogue
+MAX_ATTEMPTS = 3
+
+# Pages that no crawl is going to visit again
+_DONE = [FrontierState.PARSED, FrontierState.SKIPPED]
+
+_FRONTIER_TABLES = [
+    Base.metadata.tables[CrawlFrontierPage.__tablename__],
+    Base.metadata.tables[CrawlFrontierCast.__tablename__],
+]
+
+_COLUMNS = (
+    "url, kind, state, depth, priority, attempts, error, content,"
+    " movie_id, title, rank, actor_id"
+)
+_VALUES = ", ".join("?" * len(_COLUMNS.split(",")))
+# Pages that are already known keep their state and depth,
+# finding another link to a page that wasn't visited yet raises its priority
+_INSERT_DISCOVERED = f"""
+    INSERT INTO crawl_frontier ({_COLUMNS}) VALUES ({_VALUES})
+    ON CONFLICT (url) DO UPDATE SET
+        priority = crawl_frontier.priority + excluded.priority
+    WHERE crawl_frontier.state = 'pending'
+"""  # noqa: S608 - only constants
+_UPSERT_VISITED = f"""
+    INSERT INTO crawl_frontier ({_COLUMNS}) VALUES ({_VALUES})
+    ON CONFLICT (url) DO UPDATE SET
+        state = excluded.state,
+        attempts = excluded.attempts,
+        error = excluded.error,
+        content = excluded.content
+"""  # noqa: S608 - only constants
+_INSERT_CAST = """
+    INSERT OR IGNORE INTO crawl_frontier_cast (movie_id, actor_id, actor_name)
+    VALUES (?, ?, ?)
+"""
+
+
+# The same page is linked with and without a suffix (like `prehled/`) in different places
+_page_path_re = re.compile(r"/(?:film|tvurce)/\d+-[^/]*/")
+
+
+def _canonical_url(base_url: str, path: str) -> str:
+    match = _page_path_re.match(path)
+    return base_url + (match.group(0) if match else path)
+
+
+def movie_frontier_page(
+    movie: MovieInfo,
+    base_url: str,
+    *,
+    depth: int = 0,
+    priority: int = 0,
+) -> CrawlFrontierPage:
+    """A new frontier page for the page of `movie`."""
+    return CrawlFrontierPage(
+        url=_canonical_url(base_url, movie.url),
+        kind=PageKind.MOVIE,
+        state=FrontierState.PENDING,
+        depth=depth,
+        priority=priority,
+        movie_id=movie.id,
+        title=movie.title,
+        rank=movie.rank,
+    )
+
+
+def actor_frontier_page(
+    actor: ActorInfo,
+    base_url: str,
+    *,
+    depth: int,
+) -> CrawlFrontierPage | None:
+    """A new frontier page for the page of `actor`, if its url is known."""
+    if actor.url is None:
+        return None
+    return CrawlFrontierPage(
+        url=_canonical_url(base_url, actor.url),
+        kind=PageKind.ACTOR,
+        state=FrontierState.PENDING,
+        depth=depth,
+        priority=1,
+        actor_id=actor.id,
+    )
+
+
+def movie_info(page: CrawlFrontierPage) -> MovieInfo:
+    """The movie a movie page of the frontier belongs to."""
+    if page.movie_id is None or page.title is None:
+        msg = f"Frontier page is not a movie page, {page.url=}"
+        raise ValueError(msg)
+    return MovieInfo(title=page.title, url=page.url, rank=page.rank, id=page.movie_id)
+
+
+def _row(page: CrawlFrontierPage) -> tuple[object, ...]:
+    return (
+        page.url,
+        page.kind,
+        page.state,
+        page.depth,
+        page.priority,
+        page.attempts,
+        page.error,
+        page.content,
+        page.movie_id,
+        page.title,
+        page.rank,
+        page.actor_id,
+    )
+
+
+class IdSet:
+    """
+    Compact set of non-negative integer ids, one bit per possible id.
+
+    ČSFD ids are dense (a few million at most), so this takes a few hundred KiB
+    where a `set[int]` of a million ids takes tens of MiB.
+    """
+
+    __slots__ = ("_bits",)
+
+    def __init__(self) -> None:
+        self._bits = bytearray()
+
+    def add(self, id_: int) -> None:
+        """Add `id_` to the set."""
+        byte = id_ >> 3
+        if byte >= len(self._bits):
+            # Grown geometrically, so adding increasing ids is amortized O(1)
+            self._bits.extend(
+                bytes(max(byte + 1, 2 * len(self._bits)) - len(self._bits))
+            )
+        self._bits[byte] |= 1 << (id_ & 7)
+
+    def __contains__(self, id_: int) -> bool:  # noqa: D105
+        byte = id_ >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (id_ & 7)))
+
+
+def _write_changes(
+    session: Session,
+    discovered: list[CrawlFrontierPage],
+    visited: list[CrawlFrontierPage],
+    cast: list[tuple[int, int, str]],
+) -> None:
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.executemany(_INSERT_DISCOVERED, map(_row, discovered))  # pyright: ignore[reportArgumentType]
+        cursor.executemany(_UPSERT_VISITED, map(_row, visited))  # pyright: ignore[reportArgumentType]
+        cursor.executemany(_INSERT_CAST, cast)
+    finally:
+        cursor.close()
+
+
+class CrawlFrontier:
+    """
+    The pages of a crawl and how far along each of them is, kept in the database.
+
+    Changes are buffered and written in a single transaction (a checkpoint) every
+    `checkpoint_every` visited pages, so an interrupted crawl can be resumed
+    from its last checkpoint, and pages that failed can be retried on their own.
+
+    A page that still fails after `max_attempts` crawls is skipped,
+    the catalogue is then persisted without it.
+
+    Pages are deduplicated by url. Movies and actors whose page was already
+    visited are remembered in an `IdSet`, so links to them are dropped right away
+    instead of being buffered and written again.
+    """
+
+    def __init__(
+        self,
+        db_context: DBContext,
+        checkpoint_every: int = CHECKPOINT_EVERY,
+        max_attempts: int = MAX_ATTEMPTS,
+    ) -> None:
+        self._db_context = db_context
+        self._checkpoint_every = checkpoint_every
+        self._max_attempts = max_attempts
+        self._checkpoint_lock = asyncio.Lock()
+        self._discovered: dict[str, CrawlFrontierPage] = {}
+        self._visited: dict[str, CrawlFrontierPage] = {}
+        self._cast: list[tuple[int, int, str]] = []
+        self._visited_ids = {PageKind.MOVIE: IdSet(), PageKind.ACTOR: IdSet()}
+
+    async def reset(self) -> None:
+        """Drop everything, including the state of previous crawls."""
+        self._discovered.clear()
+        self._visited.clear()
+        self._cast.clear()
+        async with self._db_context.get_session() as session:
+            connection = await session.connection()
+            # Recreated rather than emptied, so a frontier left behind by an older
+            # version of the app can't get in the way
+            await connection.run_sync(Base.metadata.drop_all, tables=_FRONTIER_TABLES)
+            await connection.run_sync(Base.metadata.create_all, tables=_FRONTIER_TABLES)
+            await session.commit()
+        logger.debug("Reset crawl frontier")
+
+    def add(self, pages: Iterable[CrawlFrontierPage]) -> None:
+        """
+        Add pages to visit.
+
+        Pages that are already in the frontier keep their state,
+        but those that weren't visited yet get the priority of the new one added.
+        """
+        for page in pages:
+            page_id = page.movie_id if page.kind == PageKind.MOVIE else page.actor_id
+            if (
+                page_id is not None
+                and page_id in self._visited_ids[PageKind(page.kind)]
+            ):
+                continue
+            known = self._discovered.get(page.url)
+            if known is None:
+                self._discovered[page.url] = page
+            else:
+                known.priority += page.priority
+
+    async def unfinished(
+        self, kind: PageKind, depth: int = 0
+    ) -> list[CrawlFrontierPage]:
+        """All pages of `kind` at `depth` that were neither parsed nor skipped yet."""
+        await self.checkpoint()
+        async with self._db_context.get_session() as session:
+            pages = await session.scalars(
+                select(CrawlFrontierPage)
+                .where(
+                    CrawlFrontierPage.kind == kind,
+                    CrawlFrontierPage.depth == depth,
+                    CrawlFrontierPage.state.not_in(_DONE),
+                )
+                .order_by(CrawlFrontierPage.rank, CrawlFrontierPage.url)
+            )
+            return list(pages)
+
+    async def schedule(
+        self, kind: PageKind, depth: int, page_budget: int
+    ) -> list[CrawlFrontierPage]:
+        """
+        The pages of `kind` at `depth` (> 0) to visit next in a deep crawl.
+
+        That is every page a previous attempt didn't finish, and the pending pages
+        with the highest priority, as many as are left of `page_budget`
+        (the number of pages a deep crawl visits beyond the top movies).
+        """
+        await self.checkpoint()
+        async with self._db_context.get_session() as session:
+            spent = await session.scalar(
+                select(func.count()).where(
+                    CrawlFrontierPage.depth > 0,
+                    CrawlFrontierPage.state != FrontierState.PENDING,
+                )
+            )
+            level = (CrawlFrontierPage.kind == kind, CrawlFrontierPage.depth == depth)
+            retries = await session.scalars(
+                select(CrawlFrontierPage).where(
+                    *level,
+                    CrawlFrontierPage.state.in_(
+                        [FrontierState.FAILED, FrontierState.FETCHED]
+                    ),
+                )
+            )
+            pending = await session.scalars(
+                select(CrawlFrontierPage)
+                .where(*level, CrawlFrontierPage.state == FrontierState.PENDING)
+                .order_by(CrawlFrontierPage.priority.desc(), CrawlFrontierPage.url)
+                .limit(max(page_budget - (spent or 0), 0))
+            )
+            return [*retries, *pending]
+
+    async def drop_pending(self, kind: PageKind, depth: int) -> None:
+        """
+        Drop the pages of `kind` at `depth` that were not scheduled.
+
+        Once a level of a deep crawl is done, those are over the budget for good,
+        dropping them keeps the frontier from growing with every level.
+        """
+        await self.checkpoint()
+        async with self._db_context.get_session() as session:
+            dropped = await session.execute(
+                delete(CrawlFrontierPage).where(
+                    CrawlFrontierPage.kind == kind,
+                    CrawlFrontierPage.depth == depth,
+                    CrawlFrontierPage.state == FrontierState.PENDING,
+                )
+            )
+            await session.commit()
+        logger.debug(
+            "Dropped pages over budget", kind=kind, depth=depth, count=dropped.rowcount
+        )
+
+    async def unfinished_count(self) -> int:
+        """Number of pages that were neither parsed nor skipped yet."""
+        await self.checkpoint()
+        async with self._db_context.get_session() as session:
+            return (
+                await session.scalar(
+                    select(func.count()).where(CrawlFrontierPage.state.not_in(_DONE))
+                )
+                or 0
+            )
+
+    @staticmethod
+    def content(page: CrawlFrontierPage) -> bytes | None:
+        """The page as downloaded by a previous attempt, if it was kept."""
+        return None if page.content is None else zlib.decompress(page.content)
+
+    async def failed(self, page: CrawlFrontierPage, error: Exception) -> None:
+        """Record that `page` could not be downloaded."""
+        logger.warning("Could not download page", url=page.url, error=repr(error))
+        page.state = FrontierState.FAILED
+        page.error = repr(error)
+        page.content = None
+        await self._visit(page)
+
+    async def parse_failed(
+        self, page: CrawlFrontierPage, content: bytes, error: Exception
+    ) -> None:
+        """Record that `page` could not be parsed, its content is kept for the retry."""
+        logger.warning("Could not parse page", url=page.url, error=repr(error))
+        if page.content is None:
+            page.content = zlib.compress(content)
+        page.state = FrontierState.FETCHED
+        page.error = repr(error)
+        await self._visit(page)
+
+    async def parsed(
+        self,
+        page: CrawlFrontierPage,
+        *,
+        discovered: Iterable[CrawlFrontierPage] = (),
+        cast: Iterable[ActorInfo] = (),
+    ) -> None:
+        """Record the results of parsing `page`: new pages to visit, or the cast of a movie."""
+        if page.movie_id is not None:
+            movie_id = page.movie_id
+            self._cast.extend((movie_id, actor.id, actor.name) for actor in cast)
+        self.add(discovered)
+        page.state = FrontierState.PARSED
+        page.error = None
+        page.content = None
+        await self._visit(page)
+
+    async def _visit(self, page: CrawlFrontierPage) -> None:
+        page.attempts += 1
+        if page.state != FrontierState.PARSED and page.attempts >= self._max_attempts:
+            logger.error(
+                "Skipping page that failed too many times",
+                url=page.url,
+                attempts=page.attempts,
+                error=page.error,
+            )
+            page.state = FrontierState.SKIPPED
+            page.content = None
+        self._visited[page.url] = page
+        page_id = page.movie_id if page.kind == PageKind.MOVIE else page.actor_id
+        if page_id is not None:
+            self._visited_ids[PageKind(page.kind)].add(page_id)
+        if (
+            len(self._visited) >= self._checkpoint_every
+            or len(self._discovered) >= MAX_BUFFERED_DISCOVERIES
+        ):
+            await self.checkpoint()
+
+    async def checkpoint(self) -> None:
+        """Write all buffered changes to the database."""
+        async with self._checkpoint_lock:
+            discovered = list(self._discovered.values())
+            visited = list(self._visited.values())
+            cast = self._cast
+            if not (discovered or visited or cast):
+                return
+            self._discovered, self._visited, self._cast = {}, {}, []
+
+            async with self._db_context.get_session() as session:
+                await session.run_sync(_write_changes, discovered, visited, cast)
+                await session.commit()
+        logger.debug(
+            "Crawl checkpoint",
+            discovered=len(discovered),
+            visited=len(visited),
+            actors=len(cast),
+        )
+
+    async def crawl_result(self) -> CrawlResult:
+        """Collect the movies and their casts parsed so far."""
+        await self.checkpoint()
+        result = CrawlResult()
+        movie_indexes: dict[int, int] = {}
+        async with self._db_context.get_session() as session:
+            movie_pages = await session.scalars(
+                select(CrawlFrontierPage)
+                .where(
+                    CrawlFrontierPage.kind == PageKind.MOVIE,
+                    CrawlFrontierPage.state == FrontierState.PARSED,
+                )
+                .order_by(CrawlFrontierPage.rank.asc().nulls_last())
+            )
+            for page in movie_pages:
+                movie = movie_info(page)
+                if movie.id not in movie_indexes:
+                    movie_indexes[movie.id] = result.add_movie(
+                        movie.id, movie.title, movie.rank
+                    )
+
+            cast = await session.execute(
+                select(
+                    CrawlFrontierCast.movie_id,
+                    CrawlFrontierCast.actor_id,
+                    CrawlFrontierCast.actor_name,
+                )
+            )
+            for movie_id, actor_id, actor_name in cast:
+                result.add_edge(
+                    movie_indexes[movie_id],
+                    result.add_actor(ActorInfo(name=actor_name, id=actor_id)),
+                )
+        return result
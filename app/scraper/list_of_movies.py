@@ -1,12 +1,8 @@
-import asyncio
 import re
 
-import httpx
-from bs4 import BeautifulSoup, Tag
-
 from app.logger import logger
 
-from ._query_site import load_page
+from ._soup import parse_html
 from .schemas import MovieInfo
 
 URL = "https://www.csfd.cz/zebricky/filmy/nejlepsi/?from="
@@ -15,15 +11,12 @@ URL = "https://www.csfd.cz/zebricky/filmy/nejlepsi/?from="
 id_in_url_re = re.compile(r"/film/(\d+)-")
 
 
-def _parse_top_movies_page(content: bytes) -> list[MovieInfo]:
-    soup = BeautifulSoup(content, "html.parser")
-    movies_on_page = soup.find_all("article")
+def parse_top_movies_page(content: bytes) -> list[MovieInfo]:
+    """Parse the movies listed on a page of the top movies chart."""
+    soup = parse_html(content)
+    movies_on_page = soup.select("article")
     movies: list[MovieInfo] = []
     for article in movies_on_page:
-        if not isinstance(article, Tag):
-            msg = "Could not parse movie info"
-            raise TypeError(msg)
-
         rank_span = article.select_one("span.film-title-user")
         a_tag = article.select_one("a.film-title-name")
         if rank_span is None or a_tag is None:
@@ -55,18 +48,6 @@ def _parse_top_movies_page(content: bytes) -> list[MovieInfo]:
     return movies
 
 
-async def crawl_top_movies_producer(
-    client: httpx.AsyncClient,
-    semaphore: asyncio.Semaphore,
-    page: int,
-) -> list[MovieInfo]:
-    """Crawl the top movies page and put the results in the queue."""
-    url = URL + f"{1 if page == 1 else (page - 1) * 100}"
-    with logger.contextualize(scope="crawl_top_movies", page=page):
-        logger.info("Crawling top movies page")
-        async with semaphore:
-            content = await load_page(client, url)
-        logger.debug("Finished crawling page")
-        top_movies = _parse_top_movies_page(content)
-        logger.trace("Parsed top movies", found_movies=len(top_movies))
-        return top_movies
+def top_movies_page_url(page: int) -> str:
+    """URL of the n-th page of the top movies chart."""
+    return URL + f"{1 if page == 1 else (page - 1) * 100}"
@@ -1,13 +1,9 @@
-import asyncio
 import re
 
-import httpx
-from bs4 import BeautifulSoup, Tag
-
 from app.logger import logger
 
-from ._query_site import load_page
-from .schemas import ActorInfo, MovieInfo
+from ._soup import parse_html
+from .schemas import ActorInfo
 
 BASE_URL = "https://www.csfd.cz"
 
@@ -15,8 +11,9 @@ BASE_URL = "https://www.csfd.cz"
 actor_re = re.compile(r"/tvurce/(\d+)-")
 
 
-def _extract_actors_from_page(content: bytes) -> list[ActorInfo]:
-    soup = BeautifulSoup(content, "html.parser")
+def extract_actors_from_page(content: bytes) -> list[ActorInfo]:
+    """Parse the actors from the page of a movie."""
+    soup = parse_html(content)
     creators_div = soup.select_one("div.creators")
 
     if not creators_div:
@@ -24,10 +21,8 @@ def _extract_actors_from_page(content: bytes) -> list[ActorInfo]:
         raise ValueError(msg)
 
     # Inside that, find a div that contains <h4>Hrají:</h4>
-    for div in creators_div.find_all("div", recursive=False):
-        if not isinstance(div, Tag):
-            continue
-        h4 = div.find("h4")
+    for div in creators_div.select(":scope > div"):
+        h4 = div.select_one("h4")
         if h4 and h4.get_text(strip=True) == "Hrají:":
             hraji_div = div
             break
@@ -37,14 +32,14 @@ def _extract_actors_from_page(content: bytes) -> list[ActorInfo]:
         return []
 
     results: list[ActorInfo] = []
-    for a in hraji_div.find_all("a"):
+    for a in hraji_div.select("a"):
         logger.trace("Found actor link", a=a)
-        if not isinstance(a, Tag):
-            msg = "Could not found a invalid actor link"
-            raise ValueError(msg)  # noqa: TRY004
-
         link_text = a.get_text(strip=True)
-        href = str(a["href"])
+        href = a.get("href")
+        if href is None:
+            msg = f"Could not parse actor link, expected href, got {link_text=}"
+            raise ValueError(msg)
+        href = str(href)
         logger.trace("parsing actor link", parsed_link_text=link_text, parsed_href=href)
 
         if href == "#":  # Used for the "More" link that expands the list of actors
@@ -61,25 +56,8 @@ def _extract_actors_from_page(content: bytes) -> list[ActorInfo]:
             ActorInfo(
                 name=link_text,
                 id=id_,
+                url=href,
             )
         )
 
     return results
-
-
-async def find_actors_in_movie_page(
-    client: httpx.AsyncClient,
-    semaphore: asyncio.Semaphore,
-    movie: MovieInfo,
-) -> list[ActorInfo]:
-    """Consumes MovieInfo from input_queue, fetches their actors, returns the enriched MovieInfo."""
-    with logger.contextualize(scope="crawl_actors", movie_url=movie.url):
-        async with semaphore:
-            logger.trace("Crawling actors")
-            content = await load_page(client, BASE_URL + movie.url)
-            # Part of the semaphore so we don't overload the client
-            # which can cause the requests to timeout
-            # because BS4 is not exactly fast.
-            actors = _extract_actors_from_page(content)
-        logger.debug("Parsed actors", count=len(actors))
-        return actors
@@ -1,11 +1,16 @@
-from dataclasses import dataclass
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+
+from app.utils import normalize_text
 
 
 @dataclass(slots=True)
 class MovieInfo:  # noqa: D101
     title: str
     url: str
-    rank: int
+    rank: int | None  # Only movies from the top movies chart have a rank
     id: int
 
 
@@ -13,6 +18,93 @@ class MovieInfo:  # noqa: D101
 class ActorInfo:  # noqa: D101
     name: str
     id: int
+    url: str | None = None  # Only known when crawled from a movie page
 
     def __hash__(self) -> int:  # noqa: D105
         return hash(self.id)
+
+
+# Stands in for the rank of movies that aren't in the top movies chart,
+# so that they sort after all the ranked ones
+UNRANKED = 2**63 - 1
+
+
+@dataclass(slots=True)
+class CrawlResult:
+    """
+    Columnar representation of a whole crawl.
+
+    Instead of keeping a `MovieInfo` (with its url) and a list of `ActorInfo` per movie,
+    the crawl is stored as parallel arrays: the n-th movie is
+    `(movie_ids[n], movie_titles[n], movie_ranks[n])`, the same goes for actors.
+    Actors are deduplicated and their names interned, and the movie - actor edges
+    are a flat `array('q')` of `movie_idx, actor_idx` pairs.
+    Movies without a rank have `UNRANKED` in `movie_ranks`.
+
+    The `*_rows` generators yield tuples that can be passed straight to `executemany`.
+    """
+
+    movie_ids: array[int] = field(default_factory=lambda: array("q"))
+    movie_ranks: array[int] = field(default_factory=lambda: array("q"))
+    movie_titles: list[str] = field(default_factory=list[str])
+    actor_ids: array[int] = field(default_factory=lambda: array("q"))
+    actor_names: list[str] = field(default_factory=list[str])
+    edges: array[int] = field(default_factory=lambda: array("q"))
+    _actor_indexes: dict[int, int] = field(default_factory=dict[int, int])
+
+    def add_movie(self, movie_id: int, title: str, rank: int | None) -> int:
+        """Add a movie and return its index."""
+        self.movie_ids.append(movie_id)
+        self.movie_ranks.append(UNRANKED if rank is None else rank)
+        self.movie_titles.append(sys.intern(title))
+        return len(self.movie_ids) - 1
+
+    def actor_index(self, actor_id: int) -> int | None:
+        """Index of the actor with `actor_id`, if it was already added."""
+        return self._actor_indexes.get(actor_id)
+
+    def add_actor(self, actor: ActorInfo) -> int:
+        """Add an actor (if not already present) and return its index."""
+        actor_idx = self.actor_index(actor.id)
+        if actor_idx is None:
+            actor_idx = len(self.actor_ids)
+            self._actor_indexes[actor.id] = actor_idx
+            self.actor_ids.append(actor.id)
+            self.actor_names.append(sys.intern(actor.name))
+        return actor_idx
+
+    def add_edge(self, movie_idx: int, actor_idx: int) -> None:
+        """Record that the actor at `actor_idx` stars in the movie at `movie_idx`."""
+        self.edges.extend((movie_idx, actor_idx))
+
+    def add_cast(self, movie_idx: int, actors: Iterable[ActorInfo]) -> None:
+        """Add the actors starring in the movie at `movie_idx`."""
+        cast: set[int] = set()
+        for actor in actors:
+            actor_idx = self.add_actor(actor)
+            if actor_idx not in cast:
+                cast.add(actor_idx)
+                self.add_edge(movie_idx, actor_idx)
+
+    @property
+    def edge_count(self) -> int:
+        """Number of movie - actor pairs."""
+        return len(self.edges) // 2
+
+    def movie_rows(self) -> Iterator[tuple[int, str, str, int | None]]:
+        """Yield `(id, title, normalized_title, rank)` for every movie."""
+        for id_, title, rank in zip(
+            self.movie_ids, self.movie_titles, self.movie_ranks, strict=True
+        ):
+            yield id_, title, normalize_text(title), None if rank == UNRANKED else rank
+
+    def actor_rows(self) -> Iterator[tuple[int, str, str]]:
+        """Yield `(id, name, normalized_name)` for every actor."""
+        for id_, name in zip(self.actor_ids, self.actor_names, strict=True):
+            yield id_, name, normalize_text(name)
+
+    def edge_rows(self) -> Iterator[tuple[int, int]]:
+        """Yield `(movie_id, actor_id)` for every edge."""
+        edges = iter(self.edges)
+        for movie_idx, actor_idx in zip(edges, edges, strict=True):
+            yield self.movie_ids[movie_idx], self.actor_ids[actor_idx]
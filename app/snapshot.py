@@ -0,0 +1,146 @@
+import mmap
+import struct
+from array import array
+from dataclasses import dataclass
+from itertools import accumulate
+from pathlib import Path
+
+from app.logger import logger
+from app.scraper.schemas import CrawlResult
+
+# magic, format version, movies, actors, edges, size of the encoded titles
+_HEADER = struct.Struct("<4sIQQQQ")
+_MAGIC = b"MBCS"
+_FORMAT_VERSION = 1
+_INT = 8  # every array is array('q')
+
+
+def write_snapshot(path: Path, result: CrawlResult) -> None:
+    """
+    Serialize a `CrawlResult` into a file that `load_snapshot` can memory map.
+
+    The layout is the header followed by the raw arrays: movie ids, movie ranks,
+    actor ids, edges, title offsets and name offsets (all int64),
+    then the UTF-8 encoded titles and names.
+    """
+    titles = [title.encode() for title in result.movie_titles]
+    names = [name.encode() for name in result.actor_names]
+    title_offsets = array("q", accumulate(map(len, titles), initial=0))
+    name_offsets = array("q", accumulate(map(len, names), initial=0))
+
+    # Write + rename, so that workers which have the old snapshot mapped keep a valid file
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(
+            _HEADER.pack(
+                _MAGIC,
+                _FORMAT_VERSION,
+                len(result.movie_ids),
+                len(result.actor_ids),
+                result.edge_count,
+                title_offsets[-1],
+            )
+        )
+        for array_ in (
+            result.movie_ids,
+            result.movie_ranks,
+            result.actor_ids,
+            result.edges,
+            title_offsets,
+            name_offsets,
+        ):
+            array_.tofile(f)
+        f.writelines(titles)
+        f.writelines(names)
+    tmp_path.replace(path)
+    logger.info("Wrote catalogue snapshot", path=str(path), size=path.stat().st_size)
+
+
+@dataclass(slots=True, frozen=True)
+class CatalogueSnapshot:
+    """
+    Read only, memory mapped view of a catalogue written by `write_snapshot`.
+
+    The arrays are `memoryview`s straight into the mapped file,
+    so loading is O(1) and the pages are shared between all workers.
+    The arrays mean the same as in `CrawlResult` (including `UNRANKED`), titles and names
+    are decoded on demand with `movie_title` and `actor_name`.
+    """
+
+    movie_ids: memoryview
+    movie_ranks: memoryview
+    actor_ids: memoryview
+    edges: memoryview
+    title_offsets: memoryview
+    name_offsets: memoryview
+    titles: memoryview
+    names: memoryview
+
+    def movie_title(self, movie_idx: int) -> str:
+        """Title of the movie at `movie_idx`."""
+        start, end = self.title_offsets[movie_idx], self.title_offsets[movie_idx + 1]
+        return str(self.titles[start:end], "utf-8")
+
+    def actor_name(self, actor_idx: int) -> str:
+        """Name of the actor at `actor_idx`."""
+        start, end = self.name_offsets[actor_idx], self.name_offsets[actor_idx + 1]
+        return str(self.names[start:end], "utf-8")
+
+
+def load_snapshot(path: Path) -> CatalogueSnapshot | None:
+    """Memory map a snapshot, returns None if it is missing or not readable."""
+    try:
+        with path.open("rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):  # ValueError for an empty file
+        return None
+
+    view = memoryview(mapped)
+    if len(view) < _HEADER.size:
+        logger.warning("Ignoring truncated catalogue snapshot", path=str(path))
+        return None
+    magic, format_version, movies, actors, edges, titles_size = _HEADER.unpack_from(
+        view
+    )
+    if magic != _MAGIC or format_version != _FORMAT_VERSION:
+        logger.warning("Ignoring incompatible catalogue snapshot", path=str(path))
+        return None
+
+    # Ids and ranks, actor ids, edges, title offsets and name offsets
+    arrays_size = (2 * movies + actors + 2 * edges + (movies + 1) + (actors + 1)) * _INT
+    if len(view) < _HEADER.size + arrays_size + titles_size:
+        logger.warning("Ignoring truncated catalogue snapshot", path=str(path))
+        return None
+
+    position = _HEADER.size
+
+    def take(count: int) -> memoryview:
+        nonlocal position
+        part = view[position : position + count * _INT].cast("q")
+        position += count * _INT
+        return part
+
+    movie_ids = take(movies)
+    movie_ranks = take(movies)
+    actor_ids = take(actors)
+    edge_pairs = take(edges * 2)
+    title_offsets = take(movies + 1)
+    name_offsets = take(actors + 1)
+    titles = view[position : position + titles_size]
+    names = view[position + titles_size :]
+    # The names take whatever is left after the titles, their size is in the last name offset
+    if len(names) != name_offsets[-1]:
+        logger.warning("Ignoring truncated catalogue snapshot", path=str(path))
+        return None
+
+    logger.info("Loaded catalogue snapshot", movies=movies, actors=actors, edges=edges)
+    return CatalogueSnapshot(
+        movie_ids=movie_ids,
+        movie_ranks=movie_ranks,
+        actor_ids=actor_ids,
+        edges=edge_pairs,
+        title_offsets=title_offsets,
+        name_offsets=name_offsets,
+        titles=titles,
+        names=names,
+    )
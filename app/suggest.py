@@ -0,0 +1,282 @@
+import asyncio
+import heapq
+import time
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from itertools import accumulate
+
+from sqlalchemy import func, select
+
+from app.catalogue_sync import VersionListener
+from app.db import DBContext
+from app.logger import logger
+from app.models import Actor, Movie
+from app.models.movie__actor import MovieActor
+from app.scraper.schemas import UNRANKED
+from app.utils import normalize_text
+
+MAX_SUGGESTIONS = 20
+
+# Prefixes matching more names than this have their best names precomputed,
+# the names matching longer prefixes are few enough to be ranked for every query
+PRECOMPUTED_ABOVE = 256
+
+# Typos are only looked for in queries at least this long, shorter ones match too much
+MIN_TYPO_QUERY_LENGTH = 3
+
+# Sorts after every character of the normalized names
+_MAX_CHAR = "\U0010ffff"
+
+# (normalized name, score, id, name)
+type SuggestEntry = tuple[str, int, int, str]
+
+
+@dataclass(slots=True, frozen=True)
+class Suggestion:  # noqa: D101
+    id: int
+    name: str
+    score: int
+
+
+class SuggestIndex:
+    """
+    Prefix index of names for autocomplete, suggesting the names with the lowest score first.
+
+    The normalized names are kept sorted, so the names starting with a prefix are
+    a contiguous range found with two binary searches. For the short prefixes matching
+    many names, the best `MAX_SUGGESTIONS` are precomputed, the few names matching
+    a longer prefix are ranked on the fly.
+
+    When fewer names than asked for start with the query, names one typo away
+    (a character missing, added, replaced or two swapped) fill up the rest.
+    Only edits up to where the query stops matching anything are tried.
+
+    Ids and scores are arrays and the original names one string,
+    only the sorted normalized names are a list, since that is what `bisect` searches.
+    """
+
+    __slots__ = (
+        "_best",
+        "_children_of",
+        "_ids",
+        "_keys",
+        "_name_offsets",
+        "_names",
+        "_scores",
+    )
+
+    _keys: list[str]
+    _ids: array[int]
+    _scores: array[int]
+    _names: str
+    _name_offsets: array[int]
+    _best: dict[str, array[int]]
+    _children_of: dict[str, list[tuple[str, int, int]]]
+
+    def __init__(self, entries: Iterable[SuggestEntry]) -> None:
+        # Sorted by the normalized name, then the score
+        ordered = sorted(entries)
+        keys, scores, ids, names = (
+            zip(*ordered, strict=True) if ordered else ((), (), (), ())
+        )
+        self._keys = list(keys)
+        self._ids = array("q", ids)
+        self._scores = array("q", scores)
+        self._names = "".join(names)
+        self._name_offsets = array("q", accumulate(map(len, names), initial=0))
+        self._best = {}
+        self._children_of = {}
+        self._precompute_best()
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._keys)
+
+    def suggest(self, query: str, limit: int) -> list[Suggestion]:
+        """Up to `limit` (at most `MAX_SUGGESTIONS`) names starting with `query`, best first."""
+        prefix = normalize_text(query)
+        lo, hi = self._range(prefix)
+        found = self._best_of(prefix, lo, hi, limit)
+
+        if len(found) < limit and len(prefix) >= MIN_TYPO_QUERY_LENGTH:
+            # Found all the names starting with the query, which the typos can match as well
+            exact = set(found)
+            # The best `limit` of every typo are enough, even if `len(found)` of them are exact
+            near = {
+                position
+                for typo, typo_lo, typo_hi in self._typos(prefix)
+                for position in self._best_of(typo, typo_lo, typo_hi, limit)
+            }
+            found += heapq.nsmallest(
+                limit - len(found), near - exact, key=self._rank_key
+            )
+
+        return [self._suggestion(position) for position in found]
+
+    def _rank_key(self, position: int) -> tuple[int, int]:
+        return self._scores[position], position
+
+    def _suggestion(self, position: int) -> Suggestion:
+        start, end = self._name_offsets[position], self._name_offsets[position + 1]
+        return Suggestion(
+            id=self._ids[position],
+            name=self._names[start:end],
+            score=self._scores[position],
+        )
+
+    def _range(
+        self, prefix: str, lo: int = 0, hi: int | None = None
+    ) -> tuple[int, int]:
+        """Positions of the names starting with `prefix`, within `lo` and `hi`."""
+        hi = len(self._keys) if hi is None else hi
+        start = bisect_left(self._keys, prefix, lo, hi)
+        return start, bisect_left(self._keys, prefix + _MAX_CHAR, start, hi)
+
+    def _best_of(self, prefix: str, lo: int, hi: int, count: int) -> list[int]:
+        if hi - lo > PRECOMPUTED_ABOVE:
+            return self._best[prefix][:count].tolist()
+        # Stable, so ties are broken by position the same way as in `_precompute_best`
+        return heapq.nsmallest(count, range(lo, hi), key=self._scores.__getitem__)
+
+    def _children(
+        self, prefix: str, lo: int, hi: int
+    ) -> Iterator[tuple[str, int, int]]:
+        """The prefixes one character longer within the range of `prefix`, and their ranges."""
+        depth = len(prefix)
+        # Names equal to the prefix sort first
+        while lo < hi and len(self._keys[lo]) == depth:
+            lo += 1
+        while lo < hi:
+            child = prefix + self._keys[lo][depth]
+            end = bisect_left(self._keys, child + _MAX_CHAR, lo, hi)
+            yield child, lo, end
+            lo = end
+
+    def _precompute_best(self) -> None:
+        # Breadth first through the prefixes matching too many names
+        level = [("", 0, len(self._keys))]
+        while level:
+            next_level: list[tuple[str, int, int]] = []
+            for prefix, lo, hi in level:
+                if hi - lo <= PRECOMPUTED_ABOVE:
+                    continue
+                self._best[prefix] = array(
+                    "q",
+                    heapq.nsmallest(
+                        MAX_SUGGESTIONS, range(lo, hi), key=self._scores.__getitem__
+                    ),
+                )
+                # Kept for `_typos`, which goes through the children of the short prefixes a lot
+                children = self._children_of[prefix] = list(
+                    self._children(prefix, lo, hi)
+                )
+                next_level.extend(children)
+            level = next_level
+
+    def _typos(self, prefix: str) -> Iterator[tuple[str, int, int]]:
+        """The prefixes one edit away from `prefix` that some names start with, and their ranges."""
+        tried = {prefix}
+        for i in range(len(prefix)):
+            head, rest = prefix[:i], prefix[i + 1 :]
+            lo, hi = self._range(head)
+            if lo == hi:
+                # Nothing starts with `head`, so neither with any edit further on
+                return
+            # Missing and swapped characters, then replaced and added ones,
+            # with the range the candidate has to be in
+            candidates = [(head + rest, lo, hi)]
+            if rest:
+                candidates.append((head + rest[0] + prefix[i] + rest[1:], lo, hi))
+            children = self._children_of.get(head) or self._children(head, lo, hi)
+            for child, child_lo, child_hi in children:
+                candidates.append((child + rest, child_lo, child_hi))
+                candidates.append((child + prefix[i:], child_lo, child_hi))
+            for candidate, candidate_lo, candidate_hi in candidates:
+                if candidate in tried:
+                    continue
+                tried.add(candidate)
+                start = bisect_left(self._keys, candidate, candidate_lo, candidate_hi)
+                # Only look for the end of the range if anything starts with the candidate
+                if start < candidate_hi and self._keys[start].startswith(candidate):
+                    yield candidate, *self._range(candidate, start, candidate_hi)
+
+
+def _build_indexes(
+    movies: Sequence[SuggestEntry], actors: Sequence[SuggestEntry]
+) -> tuple[SuggestIndex, SuggestIndex]:
+    return SuggestIndex(movies), SuggestIndex(actors)
+
+
+class CatalogueSuggestions:
+    """
+    Autocomplete indexes of the movie titles and actor names in the catalogue.
+
+    Movies are suggested by their rank, actors by the number of movies they played in.
+    The indexes are built from the database, and rebuilt whenever a new catalogue
+    is published (see `CatalogueSync`). Until the first build, nothing is suggested.
+
+    Requests keep being answered from the previous indexes while they are rebuilt,
+    `on_rebuilt` is called once the new ones are in place, e.g. to drop cached responses.
+    """
+
+    movies: SuggestIndex
+    actors: SuggestIndex
+    _version: int | None
+    _lock: asyncio.Lock
+    _on_rebuilt: VersionListener | None
+
+    def __init__(self, on_rebuilt: VersionListener | None = None) -> None:
+        self.movies = SuggestIndex([])
+        self.actors = SuggestIndex([])
+        self._version = None
+        self._lock = asyncio.Lock()
+        self._on_rebuilt = on_rebuilt
+
+    async def rebuild(self, db_context: DBContext, version: int) -> None:
+        """Build the indexes from the catalogue of `version`, unless a newer one is built already."""
+        async with self._lock:
+            if self._version is not None and version < self._version:
+                return
+            start = time.perf_counter()
+            movie_count = func.count(MovieActor.movie_id)
+            async with db_context.get_session() as session:
+                movies = [
+                    (normalized_title, UNRANKED if rank is None else rank, id_, title)
+                    for normalized_title, id_, title, rank in (
+                        await session.execute(
+                            select(
+                                Movie.normalized_title,
+                                Movie.id,
+                                Movie.title,
+                                Movie.rank,
+                            )
+                        )
+                    ).tuples()
+                ]
+                actors = [
+                    (normalized_name, -count, id_, name)
+                    for normalized_name, id_, name, count in (
+                        await session.execute(
+                            select(
+                                Actor.normalized_name, Actor.id, Actor.name, movie_count
+                            )
+                            .outerjoin(MovieActor, MovieActor.actor_id == Actor.id)
+                            .group_by(Actor.id)
+                        )
+                    ).tuples()
+                ]
+            # Sorting a large catalogue takes a while, the event loop keeps serving meanwhile
+            self.movies, self.actors = await asyncio.to_thread(
+                _build_indexes, movies, actors
+            )
+            self._version = version
+            logger.info(
+                "Built suggestion indexes",
+                version=version,
+                movies=len(self.movies),
+                actors=len(self.actors),
+                seconds=round(time.perf_counter() - start, 3),
+            )
+            if self._on_rebuilt is not None:
+                await self._on_rebuilt(version)
@@ -0,0 +1,62 @@
+import heapq
+import time
+from collections import Counter
+
+import httpx
+from fastapi import FastAPI
+
+from app.db import DBContext
+from app.logger import logger
+from app.snapshot import CatalogueSnapshot
+
+
+def hot_paths(snapshot: CatalogueSnapshot, count: int) -> list[str]:
+    """
+    The read endpoints most likely to be requested first.
+
+    That is the best ranked movies and the actors starring in the most movies,
+    `count` of each.
+    """
+    best_ranked = heapq.nsmallest(
+        count, range(len(snapshot.movie_ids)), key=snapshot.movie_ranks.__getitem__
+    )
+    most_movies = Counter(snapshot.edges[1::2]).most_common(count)
+    return [f"/movie/{snapshot.movie_ids[movie_idx]}" for movie_idx in best_ranked] + [
+        f"/actor/{snapshot.actor_ids[actor_idx]}" for actor_idx, _ in most_movies
+    ]
+
+
+async def warm_up(
+    app: FastAPI,
+    db_context: DBContext,
+    snapshot: CatalogueSnapshot | None,
+    requests: int,
+) -> None:
+    """
+    Get the worker ready for the first wave of traffic.
+
+    Preloads the tables into the page cache, then replays requests for the hot
+    movies and actors from the snapshot through the whole app. That compiles and
+    caches the read statements and fills the compressed response cache.
+    """
+    start = time.perf_counter()
+    await db_context.preload_tables()
+
+    paths = hot_paths(snapshot, requests) if snapshot is not None else []
+    # Also compiles the search statement, the query itself doesn't matter
+    paths.append("/search?query=a")
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://warmup",
+        # What browsers send, so that the cached responses are the ones they get
+        headers={"Accept-Encoding": "gzip, deflate, br"},
+    ) as client:
+        for path in paths:
+            await client.get(path)
+
+    logger.info(
+        "Warm-up finished",
+        requests=len(paths),
+        seconds=round(time.perf_counter() - start, 3),
+    )
@@ -0,0 +1,88 @@
+"""
+Bytes on the wire and CPU time per response for each compression level.
+
+Uses payloads shaped like a `/search` for a short query and `/actor/{id}`
+for a prolific actor, and compares compressing every response
+with serving the precompressed bytes from `CompressedResponseCache`.
+
+Run with `uv run python -m benchmarks.compression`
+(`uv sync --extra brotli` to include brotli)
+"""
+
+import gzip
+import timeit
+from functools import partial
+from typing import TYPE_CHECKING
+
+from app.compression import CachedResponse, CompressedResponseCache, brotli
+from app.schemas import Actor, ActorWithMovies, Movie, MoviesAndActors
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def _search_payload() -> bytes:
+    return (
+        MoviesAndActors(
+            movies=[
+                Movie(title=f"Nějaký film s názvem {i}", rank=i, id=10_000 + i)
+                for i in range(1, 400)
+            ],
+            actors=[
+                Actor(name=f"Herec Mařenka {i}", id=50_000 + i) for i in range(2_000)
+            ],
+        )
+        .model_dump_json()
+        .encode()
+    )
+
+
+def _actor_payload() -> bytes:
+    return (
+        ActorWithMovies(
+            actor=Actor(name="Jiří Lábus", id=1),
+            movies=[
+                Movie(title=f"Film číslo {i}", rank=i, id=10_000 + i)
+                for i in range(1, 150)
+            ],
+        )
+        .model_dump_json()
+        .encode()
+    )
+
+
+def _measure(name: str, payload: bytes) -> None:
+    print(f"\n{name}: {len(payload):,} bytes uncompressed")
+    codecs: list[tuple[str, Callable[[bytes], bytes]]] = [
+        (f"gzip {level}", partial(gzip.compress, compresslevel=level, mtime=0))
+        for level in (1, 4, 6, 9)
+    ]
+    if brotli is not None:
+        codecs += [
+            (f"br {quality}", partial(brotli.compress, quality=quality))
+            for quality in (1, 4, 6, 11)
+        ]
+
+    runs = 20
+    for codec, compress in codecs:
+        size = len(compress(payload))
+        seconds = timeit.timeit(partial(compress, payload), number=runs) / runs
+        print(
+            f"  {codec:<8} {size:>9,} bytes ({size / len(payload):6.1%}) "
+            f"{seconds * 1e6:>10,.0f} µs/request"
+        )
+
+    cache = CompressedResponseCache(max_entries=16)
+    key = ("/search", b"query=a", "gzip")
+    cache.put(key, CachedResponse(200, [], gzip.compress(payload, 6)), cache.generation)
+    seconds = timeit.timeit(partial(cache.get, key), number=100_000) / 100_000
+    print(f"  {'cached':<8} {'':>9} {'':>8} {seconds * 1e6:>12.2f} µs/request")
+
+
+def main() -> None:
+    _measure("/search?query=a", _search_payload())
+    _measure("/actor/{id} of a prolific actor", _actor_payload())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Peak memory of holding a 10 page crawl and turning it into insert parameters.
+
+Compares the previous representation (a `MovieInfo` + `list[ActorInfo]` per movie,
+followed by three lists of dicts for the inserts) with `CrawlResult`.
+
+Run with `uv run python -m benchmarks.crawl_memory`
+"""
+
+import random
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.scraper.schemas import ActorInfo, CrawlResult, MovieInfo
+from app.utils import normalize_text
+
+MOVIES = 1000  # 10 pages of 100 movies
+ACTORS_PER_MOVIE = 40
+ACTOR_POOL = 20_000
+
+
+@dataclass(slots=True)
+class ParsedMovie:
+    """What the scraper hands over for a single movie page."""
+
+    movie: MovieInfo
+    cast: list[tuple[int, str]]
+
+
+def _parsed_pages() -> list[ParsedMovie]:
+    rng = random.Random(42)
+    return [
+        ParsedMovie(
+            movie=MovieInfo(
+                title=f"Movie title number {rank}",
+                url=f"/film/{rank * 7}-movie-title-number-{rank}/prehled/",
+                rank=rank,
+                id=rank * 7,
+            ),
+            cast=[
+                (actor_id, f"Actor Name {actor_id}")
+                for actor_id in rng.sample(range(ACTOR_POOL), ACTORS_PER_MOVIE)
+            ],
+        )
+        for rank in range(1, MOVIES + 1)
+    ]
+
+
+def _actor(actor_id: int, name: str) -> ActorInfo:
+    # Every parsed page produces new string objects, even for the same actor
+    return ActorInfo(name="".join(name), id=actor_id)
+
+
+def tuples_and_dicts(pages: list[ParsedMovie]) -> int:
+    top_movies = [
+        (page.movie, [_actor(actor_id, name) for actor_id, name in page.cast])
+        for page in pages
+    ]
+    movies = [movie for movie, _ in top_movies]
+    actors = {actor for _, actors in top_movies for actor in actors}
+    movie_rows = [
+        {
+            "title": movie.title,
+            "normalized_title": normalize_text(movie.title),
+            "rank": movie.rank,
+            "id": movie.id,
+        }
+        for movie in movies
+    ]
+    actor_rows = [
+        {
+            "name": actor.name,
+            "normalized_name": normalize_text(actor.name),
+            "id": actor.id,
+        }
+        for actor in actors
+    ]
+    edge_rows = [
+        {"movie_id": movie.id, "actor_id": actor.id}
+        for movie, actors in top_movies
+        for actor in actors
+    ]
+    return len(movie_rows) + len(actor_rows) + len(edge_rows)
+
+
+def columnar(pages: list[ParsedMovie]) -> int:
+    result = CrawlResult()
+    for page in pages:
+        movie_idx = result.add_movie(page.movie.id, page.movie.title, page.movie.rank)
+        result.add_cast(
+            movie_idx, [_actor(actor_id, name) for actor_id, name in page.cast]
+        )
+    # Stands in for executemany consuming the row generators
+    return (
+        sum(1 for _ in result.movie_rows())
+        + sum(1 for _ in result.actor_rows())
+        + sum(1 for _ in result.edge_rows())
+    )
+
+
+def _peak_memory(pipeline: Callable[[list[ParsedMovie]], int]) -> tuple[int, int]:
+    pages = _parsed_pages()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        rows = pipeline(pages)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return rows, peak
+
+
+def main() -> None:
+    baseline_rows, baseline_peak = _peak_memory(tuples_and_dicts)
+    columnar_rows, columnar_peak = _peak_memory(columnar)
+    assert baseline_rows == columnar_rows
+
+    print(f"{MOVIES} movies, {ACTORS_PER_MOVIE} actors each, {baseline_rows} rows")
+    print(f"tuples + dicts: {baseline_peak / 2**20:8.2f} MiB peak")
+    print(f"CrawlResult:    {columnar_peak / 2**20:8.2f} MiB peak")
+    print(f"reduction:      {1 - columnar_peak / baseline_peak:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
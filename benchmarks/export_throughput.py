@@ -0,0 +1,92 @@
+"""
+Throughput and peak memory of `/export` and `/import` for growing catalogues.
+
+Peak memory of the export should stay flat while the catalogue grows,
+since rows are streamed from a server side cursor.
+
+Run with `uv run python -m benchmarks.export_throughput`
+"""
+
+import asyncio
+import random
+import tempfile
+import time
+import tracemalloc
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from app.bulk import export_catalogue, read_catalogue
+from app.db import DBContext, create_db_context
+from app.load_data import persist_movies_and_actors
+from app.scraper.schemas import ActorInfo, CrawlResult
+
+ACTORS_PER_MOVIE = 30
+
+
+def synthetic_catalogue(movies: int) -> CrawlResult:
+    rng = random.Random(42)
+    actor_pool = movies * 10
+    result = CrawlResult()
+    for rank in range(1, movies + 1):
+        movie_idx = result.add_movie(rank, f"Movie title number {rank}", rank)
+        result.add_cast(
+            movie_idx,
+            [
+                ActorInfo(name=f"Actor Name {actor_id}", id=actor_id)
+                for actor_id in rng.sample(range(actor_pool), ACTORS_PER_MOVIE)
+            ],
+        )
+    return result
+
+
+async def _export(db_context: DBContext) -> tuple[int, int, float, int]:
+    lines = size = 0
+    start = time.perf_counter()
+    async for chunk in export_catalogue(db_context):
+        lines += chunk.count(b"\n")
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+
+    # Separate pass, tracemalloc slows everything down a lot
+    tracemalloc.start()
+    async for _ in export_catalogue(db_context):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return lines, size, elapsed, peak
+
+
+async def _import(db_context: DBContext) -> float:
+    chunks = [chunk async for chunk in export_catalogue(db_context)]
+
+    async def stream() -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
+
+    start = time.perf_counter()
+    result = await read_catalogue(stream())
+    await persist_movies_and_actors(db_context, result)
+    return time.perf_counter() - start
+
+
+async def _run(movies: int, directory: Path) -> None:
+    async with create_db_context(directory / f"export_{movies}.db") as db_context:
+        await persist_movies_and_actors(db_context, synthetic_catalogue(movies))
+        lines, size, export_time, peak = await _export(db_context)
+        import_time = await _import(db_context)
+
+    print(
+        f"{movies:>7} movies | {lines:>9} lines {size / 2**20:7.1f} MiB | "
+        f"export {lines / export_time:>9,.0f} lines/s, {peak / 2**20:5.2f} MiB peak | "
+        f"import {lines / import_time:>9,.0f} lines/s"
+    )
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for movies in (1_000, 10_000, 50_000):
+            await _run(movies, Path(directory))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Latency and errors of `/search` under load, with its two scans on one session or in parallel.
+
+`asyncio.gather` over one `AsyncSession` (how `/search` used to run them) is compared
+with running them one after the other, and with `DBContext.execute_parallel`,
+which gives each scan its own pooled connection.
+
+Run with `uv run python -m benchmarks.parallel_search`
+"""
+
+import asyncio
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import bindparam, select
+
+from app.db import DBContext, create_db_context
+from app.load_data import persist_movies_and_actors
+from app.models import Actor, Movie
+from benchmarks.export_throughput import synthetic_catalogue
+
+MOVIES = 20_000
+SEARCHES = 200
+
+_MOVIES_STMT = select(Movie).where(Movie.normalized_title.ilike(bindparam("pattern")))
+_ACTORS_STMT = select(Actor).where(Actor.normalized_name.ilike(bindparam("pattern")))
+
+type Search = Callable[[DBContext, dict[str, Any]], Awaitable[object]]
+
+
+async def _gather_on_one_session(
+    db_context: DBContext, params: dict[str, Any]
+) -> object:
+    async with db_context.get_session() as session:
+        return await asyncio.gather(
+            session.execute(_MOVIES_STMT, params), session.execute(_ACTORS_STMT, params)
+        )
+
+
+async def _sequential(db_context: DBContext, params: dict[str, Any]) -> object:
+    async with db_context.get_session() as session:
+        return [
+            await session.execute(_MOVIES_STMT, params),
+            await session.execute(_ACTORS_STMT, params),
+        ]
+
+
+async def _parallel(db_context: DBContext, params: dict[str, Any]) -> object:
+    return await db_context.execute_parallel(_MOVIES_STMT, _ACTORS_STMT, params=params)
+
+
+async def _measure(
+    name: str, db_context: DBContext, search: Search, concurrency: int
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                # A few matches each, so the time goes into the scans
+                await search(db_context, {"pattern": f"% {1000 + i * 97}1%"})
+            except Exception:  # noqa: BLE001 - counting them is the point
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(SEARCHES)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    summary = (
+        f"median {statistics.median(latencies) * 1000:6.1f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.1f} ms"
+        if latencies
+        else "no successful searches"
+    )
+    print(
+        f"{name:<22} {concurrency:>2} at a time | {summary} | "
+        f"{SEARCHES / elapsed:6.1f} searches/s | {errors} errors"
+    )
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = Path(directory) / "search.db"
+        async with create_db_context(db_path) as db_context:
+            await persist_movies_and_actors(db_context, synthetic_catalogue(MOVIES))
+
+        for concurrency in (1, 4, 16):
+            for name, search in (
+                ("one after the other", _sequential),
+                ("execute_parallel", _parallel),
+                ("gather on one session", _gather_on_one_session),
+            ):
+                # A fresh pool every time, the failing searches leak their connections
+                async with create_db_context(db_path) as db_context:
+                    await _measure(name, db_context, search, concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
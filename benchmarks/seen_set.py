@@ -0,0 +1,58 @@
+"""
+Memory and lookup cost of the deep crawl seen-set, `IdSet` against a `set[int]`.
+
+Run with `uv run python -m benchmarks.seen_set`
+"""
+
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from app.scraper.frontier import IdSet
+
+IDS = 1_000_000
+MAX_ID = 1_500_000  # about the highest movie id on ČSFD
+LOOKUPS = 1_000_000
+
+
+def _id_set(ids: list[int]) -> IdSet | set[int]:
+    seen = IdSet()
+    for id_ in ids:
+        seen.add(id_)
+    return seen
+
+
+def _builtin_set(ids: list[int]) -> IdSet | set[int]:
+    return set(ids)
+
+
+def _measure(name: str, build: Callable[[list[int]], IdSet | set[int]]) -> None:
+    rng = random.Random(42)
+    ids = rng.sample(range(MAX_ID), IDS)
+    lookups = [rng.randrange(MAX_ID) for _ in range(LOOKUPS)]
+
+    tracemalloc.start()
+    try:
+        seen = build(ids)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    start = time.perf_counter()
+    hits = sum(id_ in seen for id_ in lookups)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<9} {size / 2**20:7.2f} MiB, "
+        f"{elapsed / LOOKUPS * 1e9:5.0f} ns per lookup ({hits} hits)"
+    )
+
+
+def main() -> None:
+    print(f"{IDS} ids out of {MAX_ID}")
+    _measure("IdSet", _id_set)
+    _measure("set[int]", _builtin_set)
+
+
+if __name__ == "__main__":
+    main()
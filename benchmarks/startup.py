@@ -0,0 +1,139 @@
+"""
+Import time of the app and time to the first fast responses, with and without `WARM_START`.
+
+Starts a real uvicorn worker on a synthetic catalogue, evicts the database
+from the OS page cache before every run, and measures how long `/ready` takes
+and how fast the first requests for the hot movies and actors are.
+
+Run with `uv run python -m benchmarks.startup`
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from app.db import create_db_context
+from app.load_data import persist_movies_and_actors
+from app.snapshot import load_snapshot, write_snapshot
+from app.warmup import hot_paths
+from benchmarks.export_throughput import synthetic_catalogue
+
+MOVIES = 20_000
+HOT_REQUESTS = 50
+
+
+def _import_time() -> None:
+    code = "import sys, app.main; print('bs4' in sys.modules)"
+    timings: list[float] = []
+    bs4_loaded = ""
+    for _ in range(5):
+        start = time.perf_counter()
+        bs4_loaded = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "LOG_LEVEL": "WARNING"},
+        ).stdout.strip()
+        timings.append(time.perf_counter() - start)
+    print(f"import app.main: {min(timings) * 1000:.0f} ms, bs4 imported: {bs4_loaded}")
+
+
+async def _create_catalogue(db_path: Path) -> None:
+    result = synthetic_catalogue(MOVIES)
+    async with create_db_context(db_path) as db_context:
+        await persist_movies_and_actors(db_context, result)
+    write_snapshot(db_path.with_name(f"{db_path.name}.snapshot"), result)
+
+
+def _evict_from_page_cache(path: Path) -> None:
+    for file in path.parent.glob(f"{path.name}*"):
+        fd = os.open(file, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _run_worker(db_path: Path, paths: list[str], *, warm_start: bool) -> None:
+    _evict_from_page_cache(db_path)
+    port = _free_port()
+    start = time.perf_counter()
+    worker = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--no-access-log",
+            "--port",
+            str(port),
+        ],
+        env={
+            **os.environ,
+            "SQLITE_FILE_PATH": str(db_path),
+            "WARM_START": str(warm_start),
+            "WARM_START_REQUESTS": str(HOT_REQUESTS),
+            "LOG_LEVEL": "WARNING",
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(
+            base_url=f"http://127.0.0.1:{port}",
+            headers={"Accept-Encoding": "gzip, deflate, br"},
+        ) as client:
+            while True:
+                try:
+                    if client.get("/ready").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+            ready = time.perf_counter() - start
+
+            latencies: list[float] = []
+            for path in paths:
+                request_start = time.perf_counter()
+                client.get(path).raise_for_status()
+                latencies.append(time.perf_counter() - request_start)
+    finally:
+        worker.terminate()
+        worker.wait()
+
+    print(
+        f"WARM_START={warm_start!s:<5} ready after {ready * 1000:6.0f} ms | "
+        f"first {len(paths)} hot requests: median {statistics.median(latencies) * 1000:5.2f} ms, "
+        f"max {max(latencies) * 1000:5.2f} ms, total {sum(latencies) * 1000:6.1f} ms"
+    )
+
+
+def main() -> None:
+    _import_time()
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = Path(directory) / "startup.db"
+        asyncio.run(_create_catalogue(db_path))
+        snapshot = load_snapshot(db_path.with_name(f"{db_path.name}.snapshot"))
+        assert snapshot is not None
+        paths = hot_paths(snapshot, HOT_REQUESTS)
+        for warm_start in (False, True, False, True):
+            _run_worker(db_path, paths, warm_start=warm_start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Build time, memory and query latency of the `/suggest` index for a million names.
+
+Queries are prefixes of random names of every length, with and without a typo,
+compared with scanning all the names for the same prefix.
+
+Run with `uv run python -m benchmarks.suggest`
+"""
+
+import random
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from app.suggest import SuggestEntry, SuggestIndex
+from app.utils import normalize_text
+
+NAMES = 1_000_000
+QUERIES = 2_000
+LIMIT = 10
+
+_SYLLABLES = [
+    "ja",
+    "ro",
+    "mír",
+    "ka",
+    "pe",
+    "tr",
+    "no",
+    "vá",
+    "če",
+    "ko",
+    "la",
+    "ši",
+    "ma",
+    "ří",
+    "de",
+    "ne",
+    "bo",
+    "hu",
+    "zd",
+    "ek",
+    "ová",
+    "sl",
+    "av",
+    "an",
+]
+
+
+def _name(rng: random.Random) -> str:
+    def word() -> str:
+        return "".join(rng.choices(_SYLLABLES, k=rng.randint(2, 4))).capitalize()
+
+    return f"{word()} {word()}"
+
+
+def _entries(rng: random.Random) -> list[SuggestEntry]:
+    names = [_name(rng) for _ in range(NAMES)]
+    return [
+        (normalize_text(name), rng.randrange(NAMES), id_, name)
+        for id_, name in enumerate(names)
+    ]
+
+
+def _typo(rng: random.Random, text: str) -> str:
+    i = rng.randrange(len(text))
+    match rng.randrange(3):
+        case 0:
+            return text[:i] + text[i + 1 :]
+        case 1:
+            return text[:i] + rng.choice("aeiklmnorst") + text[i + 1 :]
+        case _:
+            return text[:i] + rng.choice("aeiklmnorst") + text[i:]
+
+
+def _measure(name: str, queries: list[str], suggest: Callable[[str], object]) -> None:
+    latencies: list[float] = []
+    for query in queries:
+        start = time.perf_counter()
+        suggest(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(
+        f"{name:<28} median {statistics.median(latencies) * 1000:6.3f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.3f} ms, "
+        f"max {latencies[-1] * 1000:6.3f} ms"
+    )
+
+
+def main() -> None:
+    rng = random.Random(42)
+    entries = _entries(rng)
+
+    start = time.perf_counter()
+    index = SuggestIndex(entries)
+    build = time.perf_counter() - start
+
+    # Separate build, tracemalloc slows everything down a lot
+    tracemalloc.start()
+    measured = SuggestIndex(entries)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+    print(f"{NAMES} names, built in {build:.2f} s, {size / 2**20:.0f} MiB")
+
+    for length in (1, 2, 4, 8):
+        prefixes = [name[:length] for _, _, _, name in rng.choices(entries, k=QUERIES)]
+        _measure(
+            f"prefix of {length}", prefixes, lambda query: index.suggest(query, LIMIT)
+        )
+    typos = [_typo(rng, name[:8]) for _, _, _, name in rng.choices(entries, k=QUERIES)]
+    _measure(
+        "prefix of 8 with a typo", typos, lambda query: index.suggest(query, LIMIT)
+    )
+
+    keys = [key for key, _, _, _ in entries]
+    _measure(
+        "scan of all names",
+        [normalize_text(query) for query in typos[:20]],
+        lambda query: [key for key in keys if key.startswith(query)],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import re
+from collections.abc import AsyncGenerator, Generator
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.dependencies import httpx_client
+from app.main import app
+
+# A tiny fake ČSFD, so the crawl can be tested without hitting the real site
+MOVIES_PER_PAGE = 5
+ACTORS_PER_MOVIE = 3
+ACTOR_POOL = 12
+
+
+def stub_movie_id(rank: int) -> int:
+    return 1000 + rank
+
+
+def stub_movie_path(rank: int) -> str:
+    return f"/film/{stub_movie_id(rank)}-film-{rank}/"
+
+
+def stub_movie_title(rank: int) -> str:
+    return f"Žluťoučký kůň {rank}"
+
+
+def stub_actor_ids(rank: int) -> list[int]:
+    return [(rank + offset) % ACTOR_POOL + 1 for offset in range(ACTORS_PER_MOVIE)]
+
+
+def stub_actor_name(actor_id: int) -> str:
+    return f"Herec Číslo {actor_id}"
+
+
+# Movies that are far down the chart, so they are only found by deep crawls
+DEEP_RANK_OFFSET = 100
+
+
+def stub_filmography(actor_id: int) -> list[int]:
+    """Ranks of the movies an actor played in, according to their page."""
+    return [actor_id, DEEP_RANK_OFFSET + actor_id]
+
+
+def stub_directed(actor_id: int) -> int:
+    """Rank of a movie the actor only directed."""
+    return 2 * DEEP_RANK_OFFSET + actor_id
+
+
+def _list_page(first_rank: int) -> str:
+    articles = "".join(
+        f"""
+        <article>
+            <span class="film-title-user">{rank}.</span>
+            <a class="film-title-name" href="{stub_movie_path(rank)}">
+                {stub_movie_title(rank)}
+            </a>
+        </article>
+        """
+        for rank in range(first_rank, first_rank + MOVIES_PER_PAGE)
+    )
+    return f"<html><body>{articles}</body></html>"
+
+
+def _movie_page(rank: int) -> str:
+    actors = ", ".join(
+        f'<a href="/tvurce/{actor_id}-herec/">{stub_actor_name(actor_id)}</a>'
+        for actor_id in stub_actor_ids(rank)
+    )
+    return f"""
+    <html><body>
+        <div class="creators">
+            <div><h4>Režie:</h4><a href="/tvurce/999-reziser/">Režisér</a></div>
+            <div><h4>Hrají:</h4>{actors}<a href="#">více</a></div>
+        </div>
+    </body></html>
+    """
+
+
+def _actor_page(actor_id: int) -> str:
+    def film_link(rank: int) -> str:
+        return (
+            f'<a class="film-title-name" href="{stub_movie_path(rank)}prehled/">'
+            f"{stub_movie_title(rank)}</a>"
+        )
+
+    acted = "".join(
+        f"<tr><td>{film_link(rank)}</td></tr>" for rank in stub_filmography(actor_id)
+    )
+    episode = (
+        f'<a class="film-title-name" href="{stub_movie_path(1)}999-epizoda/">'
+        "Epizoda</a>"
+    )
+    return f"""
+    <html><body>
+        <h1>{stub_actor_name(actor_id)}</h1>
+        <section><header><h2>Herec</h2></header>
+            <table>{acted}<tr><td>{episode}</td></tr></table>
+        </section>
+        <section><header><h2>Režie</h2></header>
+            <table><tr><td>{film_link(stub_directed(actor_id))}</td></tr></table>
+        </section>
+    </body></html>
+    """
+
+
+def csfd_stub_handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/zebricky/filmy/nejlepsi/":
+        from_ = int(request.url.params["from"])
+        page = 1 if from_ == 1 else from_ // 100 + 1
+        return httpx.Response(200, text=_list_page((page - 1) * MOVIES_PER_PAGE + 1))
+    if match := re.fullmatch(r"/film/(\d+)-.*", request.url.path):
+        return httpx.Response(200, text=_movie_page(int(match.group(1)) - 1000))
+    if match := re.fullmatch(r"/tvurce/(\d+)-.*", request.url.path):
+        return httpx.Response(200, text=_actor_page(int(match.group(1))))
+    return httpx.Response(404)
+
+
+class StubCsfd:
+    """The fake ČSFD, records the requested paths and can break some of them."""
+
+    def __init__(self) -> None:
+        self.requested_paths: list[str] = []
+        self.failing_paths: set[str] = set()  # respond with a server error
+        self.broken_paths: set[str] = set()  # respond with a page that can't be parsed
+        self.pages: dict[str, str] = {}  # respond with the given page instead
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requested_paths.append(request.url.path)
+        if request.url.path in self.failing_paths:
+            return httpx.Response(500)
+        if request.url.path in self.broken_paths:
+            return httpx.Response(200, text="<html><body>Nope</body></html>")
+        if request.url.path in self.pages:
+            return httpx.Response(200, text=self.pages[request.url.path])
+        return csfd_stub_handler(request)
+
+
+@pytest.fixture
+def stub_csfd() -> StubCsfd:
+    return StubCsfd()
+
+
+@pytest.fixture
+def stub_test_client(stub_csfd: StubCsfd) -> Generator[TestClient]:
+    """A test client with its own in-memory database, crawling the fake ČSFD."""
+
+    async def stub_httpx_client() -> AsyncGenerator[httpx.AsyncClient]:
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(stub_csfd)
+        ) as client:
+            yield client
+
+    app.dependency_overrides[httpx_client] = stub_httpx_client
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,82 @@
+import json
+
+from conftest import MOVIES_PER_PAGE, stub_movie_id
+from fastapi.testclient import TestClient
+
+from app.schemas import MovieWithActors
+
+CATALOGUE = [
+    {"type": "movie", "id": 9499, "title": "Matrix", "rank": 1},
+    {"type": "movie", "id": 1, "title": "John Wick", "rank": 2},
+    {"type": "actor", "id": 7, "name": "Keanu Reeves"},
+    {"type": "actor", "id": 8, "name": "Carrie-Anne Moss"},
+    {"type": "edge", "movie_id": 9499, "actor_id": 7},
+    {"type": "edge", "movie_id": 9499, "actor_id": 8},
+    {"type": "edge", "movie_id": 1, "actor_id": 7},
+]
+
+
+def _ndjson(records: list[dict[str, str | int]]) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+
+def test_export_streams_whole_catalogue(stub_test_client: TestClient) -> None:
+    stub_test_client.post("/crawl/load_movies_data", params={"pages_to_crawl": 1})
+
+    response = stub_test_client.get("/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    types = [record["type"] for record in records]
+    # movies first, then actors, then edges
+    assert types == sorted(types, key=["movie", "actor", "edge"].index)
+    assert types.count("movie") == MOVIES_PER_PAGE
+    assert {"type": "movie", "id": stub_movie_id(1)}.items() <= records[0].items()
+
+
+def test_import_replaces_catalogue(stub_test_client: TestClient) -> None:
+    stub_test_client.post("/crawl/load_movies_data", params={"pages_to_crawl": 1})
+
+    response = stub_test_client.post("/import", content=_ndjson(CATALOGUE))
+    assert response.status_code == 204
+
+    assert stub_test_client.get(f"/movie/{stub_movie_id(1)}").status_code == 404
+    movie = MovieWithActors.model_validate(stub_test_client.get("/movie/9499").json())
+    assert {actor.name for actor in movie.actors} == {
+        "Keanu Reeves",
+        "Carrie-Anne Moss",
+    }
+
+    # Importing an export is a no-op
+    exported = stub_test_client.get("/export").content
+    assert stub_test_client.post("/import", content=exported).status_code == 204
+    assert stub_test_client.get("/export").content == exported
+
+
+def test_invalid_import_keeps_catalogue(stub_test_client: TestClient) -> None:
+    assert (
+        stub_test_client.post("/import", content=_ndjson(CATALOGUE)).status_code == 204
+    )
+
+    unknown_actor = [*CATALOGUE, {"type": "edge", "movie_id": 1, "actor_id": 42}]
+    response = stub_test_client.post("/import", content=_ndjson(unknown_actor))
+    assert response.status_code == 422
+    assert "line 8" in response.json()["detail"]
+
+    duplicate_actor = [
+        *CATALOGUE[:4],
+        {"type": "actor", "id": 7, "name": "Keanu"},
+        *CATALOGUE[4:],
+    ]
+    response = stub_test_client.post("/import", content=_ndjson(duplicate_actor))
+    assert response.status_code == 422
+    assert "line 5: duplicate actor 7" in response.json()["detail"]
+
+    duplicate_edge = [*CATALOGUE, CATALOGUE[-1]]
+    assert (
+        stub_test_client.post("/import", content=_ndjson(duplicate_edge)).status_code
+        == 422
+    )
+
+    assert stub_test_client.get("/movie/9499").status_code == 200
@@ -0,0 +1,79 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.catalogue_sync import CatalogueSync
+from app.db import create_db_context
+from app.models import Movie
+
+
+def test_only_one_leader(tmp_path: Path) -> None:
+    db_path = tmp_path / "crawled.db"
+    leader = CatalogueSync(db_path)
+    follower = CatalogueSync(db_path)
+
+    with leader.leadership():
+        with pytest.raises(HTTPException) as exc_info, follower.leadership():
+            pass
+        assert exc_info.value.status_code == 409
+
+    # The lock is released once the leader is done
+    with follower.leadership():
+        pass
+
+
+def test_follower_sees_published_version(tmp_path: Path) -> None:
+    db_path = tmp_path / "crawled.db"
+    leader = CatalogueSync(db_path)
+    follower = CatalogueSync(db_path)
+    seen_versions: list[int] = []
+
+    async def on_version(version: int) -> None:
+        seen_versions.append(version)
+
+    follower.add_listener(on_version)
+
+    async def run() -> None:
+        watcher = asyncio.create_task(follower.watch(0.01))
+        with leader.leadership():
+            await leader.publish()
+        await asyncio.sleep(0.1)
+        watcher.cancel()
+
+    asyncio.run(run())
+
+    assert leader.version == 1
+    assert follower.version == 1
+    assert seen_versions == [1]
+
+
+def test_in_memory_database_is_process_local() -> None:
+    catalogue_sync = CatalogueSync(":memory:")
+
+    with catalogue_sync.leadership():
+        with pytest.raises(HTTPException), catalogue_sync.leadership():
+            pass
+        assert asyncio.run(catalogue_sync.publish()) == 1
+
+
+def test_in_memory_database_survives_publish() -> None:
+    catalogue_sync = CatalogueSync(":memory:")
+
+    async def run() -> list[str]:
+        async with create_db_context(":memory:") as db_context:
+            catalogue_sync.add_listener(
+                lambda _version: db_context.refresh_connections()
+            )
+            async with db_context.get_session(auto_commit=True) as session:
+                session.add(
+                    Movie(id=1, title="Matrix", normalized_title="matrix", rank=1)
+                )
+            with catalogue_sync.leadership():
+                await catalogue_sync.publish()
+            async with db_context.get_session() as session:
+                return list((await session.execute(select(Movie.title))).scalars())
+
+    assert asyncio.run(run()) == ["Matrix"]
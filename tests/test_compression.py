@@ -0,0 +1,77 @@
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import compressed_cache
+from app.schemas import MoviesAndActors
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def test_large_responses_are_compressed(stub_test_client: TestClient) -> None:
+    stub_test_client.post("/crawl/load_movies_data", params={"pages_to_crawl": 2})
+
+    response = stub_test_client.get("/search", params={"query": "c"}, headers=GZIP)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert MoviesAndActors.model_validate(response.json()).actors
+
+    plain = stub_test_client.get(
+        "/search", params={"query": "c"}, headers={"Accept-Encoding": "identity"}
+    )
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == response.json()
+
+
+def test_small_responses_are_not_compressed(stub_test_client: TestClient) -> None:
+    response = stub_test_client.get("/movie/1", headers=GZIP)
+    assert response.status_code == 404
+    assert "content-encoding" not in response.headers
+
+
+def test_cached_response_is_dropped_on_new_catalogue(
+    stub_test_client: TestClient,
+) -> None:
+    stub_test_client.post("/crawl/load_movies_data", params={"pages_to_crawl": 2})
+    key = ("/search", b"query=c", "gzip")
+
+    first = stub_test_client.get("/search", params={"query": "c"}, headers=GZIP)
+    cached = compressed_cache.get(key)
+    assert cached is not None
+    assert json.loads(gzip.decompress(cached.body)) == first.json()
+
+    stub_test_client.post("/crawl/load_movies_data", params={"pages_to_crawl": 1})
+    assert compressed_cache.get(key) is None
+
+    second = stub_test_client.get("/search", params={"query": "c"}, headers=GZIP)
+    assert len(second.json()["movies"]) < len(first.json()["movies"])
+
+
+def test_streaming_response_is_compressed(stub_test_client: TestClient) -> None:
+    stub_test_client.post("/crawl/load_movies_data", params={"pages_to_crawl": 1})
+
+    response = stub_test_client.get("/export", headers=GZIP)
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert all(json.loads(line) for line in response.text.splitlines())
+
+
+def test_refused_coding_is_not_picked_by_wildcard(
+    stub_test_client: TestClient,
+) -> None:
+    stub_test_client.post("/crawl/load_movies_data", params={"pages_to_crawl": 2})
+
+    def encoding(accept_encoding: str) -> str | None:
+        response = stub_test_client.get(
+            "/search",
+            params={"query": "c"},
+            headers={"Accept-Encoding": accept_encoding},
+        )
+        return response.headers.get("content-encoding")
+
+    assert encoding("*") == "gzip"
+    assert encoding("gzip;q=0, *") is None
+    assert encoding("gzip;q=0, *;q=0.5") is None
+    assert encoding("identity;q=0.5, *") == "gzip"
@@ -0,0 +1,134 @@
+import asyncio
+
+import httpx
+import pytest
+from conftest import (
+    ACTORS_PER_MOVIE,
+    MOVIES_PER_PAGE,
+    StubCsfd,
+    csfd_stub_handler,
+    stub_movie_id,
+    stub_movie_path,
+)
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.db import DBContext, create_db_context
+from app.models import CrawlFrontierPage, FrontierState
+from app.schemas import MovieWithActors
+from app.scraper import get_top_movies
+from app.scraper.frontier import MAX_ATTEMPTS, CrawlFrontier
+
+CRAWL = "/crawl/load_movies_data"
+
+
+def test_failed_movie_is_retried_on_resume(
+    stub_test_client: TestClient, stub_csfd: StubCsfd
+) -> None:
+    failing = stub_movie_path(3)
+    stub_csfd.failing_paths.add(failing)
+
+    response = stub_test_client.post(CRAWL, params={"pages_to_crawl": 2})
+    assert response.status_code == 503
+    assert "1 pages" in response.json()["detail"]
+    # The catalogue isn't replaced by an incomplete crawl
+    assert stub_test_client.get(f"/movie/{stub_movie_id(1)}").status_code == 404
+
+    stub_csfd.failing_paths.clear()
+    stub_csfd.requested_paths.clear()
+    response = stub_test_client.post(
+        CRAWL, params={"pages_to_crawl": 2, "resume": True}
+    )
+    assert response.status_code == 204
+    # Only the failed page is fetched again
+    assert stub_csfd.requested_paths == [failing]
+
+    for rank in range(1, 2 * MOVIES_PER_PAGE + 1):
+        movie = MovieWithActors.model_validate(
+            stub_test_client.get(f"/movie/{stub_movie_id(rank)}").json()
+        )
+        assert len(movie.actors) == ACTORS_PER_MOVIE
+
+
+def test_unparsable_page_is_not_downloaded_again(
+    stub_test_client: TestClient, stub_csfd: StubCsfd
+) -> None:
+    stub_csfd.broken_paths.add(stub_movie_path(2))
+
+    assert stub_test_client.post(CRAWL).status_code == 503
+    stub_csfd.requested_paths.clear()
+    assert stub_test_client.post(CRAWL, params={"resume": True}).status_code == 503
+    # The kept page was parsed again, without downloading anything
+    assert stub_csfd.requested_paths == []
+
+    # A new crawl starts over and doesn't keep anything from the previous one
+    stub_csfd.broken_paths.clear()
+    assert stub_test_client.post(CRAWL).status_code == 204
+    assert len(stub_csfd.requested_paths) == 1 + MOVIES_PER_PAGE
+
+
+def test_malformed_cast_link_fails_only_its_page(
+    stub_test_client: TestClient, stub_csfd: StubCsfd
+) -> None:
+    stub_csfd.pages[stub_movie_path(2)] = (
+        '<div class="creators"><div><h4>Hrají:</h4><a>x</a></div></div>'
+    )
+
+    response = stub_test_client.post(CRAWL)
+    assert response.status_code == 503
+    assert "1 pages" in response.json()["detail"]
+
+
+def test_failing_crawl_stops_its_other_pages() -> None:
+    crashing = stub_movie_path(1)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == crashing:
+            msg = "Crashed"
+            raise RuntimeError(msg)
+        if request.url.path.startswith("/film/"):
+            await asyncio.sleep(0.05)
+        return csfd_stub_handler(request)
+
+    async def parsed_pages(db_context: DBContext) -> int:
+        async with db_context.get_session() as session:
+            return (
+                await session.scalar(
+                    select(func.count()).where(
+                        CrawlFrontierPage.state == FrontierState.PARSED
+                    )
+                )
+            ) or 0
+
+    async def run() -> tuple[int, int]:
+        async with (
+            create_db_context(":memory:") as db_context,
+            httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client,
+        ):
+            frontier = CrawlFrontier(db_context, checkpoint_every=1)
+            await frontier.reset()
+            with pytest.raises(ExceptionGroup):
+                await get_top_movies(client, frontier)
+            when_returned = await parsed_pages(db_context)
+            await asyncio.sleep(0.2)
+            return when_returned, await parsed_pages(db_context)
+
+    when_returned, later = asyncio.run(run())
+    # Only the list page, the movie pages were cancelled with the crash
+    assert when_returned == later == 1
+
+
+def test_page_failing_every_time_is_skipped(
+    stub_test_client: TestClient, stub_csfd: StubCsfd
+) -> None:
+    stub_csfd.failing_paths.add(stub_movie_path(2))
+
+    assert stub_test_client.post(CRAWL).status_code == 503
+    for _ in range(MAX_ATTEMPTS - 2):
+        assert stub_test_client.post(CRAWL, params={"resume": True}).status_code == 503
+    # The last attempt gives up on the page, and the catalogue is replaced without it
+    assert stub_test_client.post(CRAWL, params={"resume": True}).status_code == 204
+
+    assert stub_test_client.get(f"/movie/{stub_movie_id(2)}").status_code == 404
+    for rank in (1, *range(3, MOVIES_PER_PAGE + 1)):
+        assert stub_test_client.get(f"/movie/{stub_movie_id(rank)}").status_code == 200
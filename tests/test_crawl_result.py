@@ -0,0 +1,50 @@
+from conftest import (
+    ACTORS_PER_MOVIE,
+    MOVIES_PER_PAGE,
+    stub_actor_ids,
+    stub_actor_name,
+    stub_movie_id,
+    stub_movie_title,
+)
+from fastapi.testclient import TestClient
+
+from app.schemas import MovieWithActors
+from app.scraper.schemas import ActorInfo, CrawlResult
+
+
+def test_crawl_result_is_deduplicated() -> None:
+    result = CrawlResult()
+    matrix = result.add_movie(9499, "Matrix", 1)
+    john_wick = result.add_movie(1, "John Wick", 2)
+    keanu = ActorInfo(name="Keanu Reeves", id=7)
+
+    result.add_cast(matrix, [keanu, ActorInfo(name="Carrie-Anne Moss", id=8), keanu])
+    result.add_cast(john_wick, [ActorInfo(name="Keanu Reeves", id=7)])
+
+    assert list(result.movie_rows()) == [
+        (9499, "Matrix", "matrix", 1),
+        (1, "John Wick", "john wick", 2),
+    ]
+    assert list(result.actor_rows()) == [
+        (7, "Keanu Reeves", "keanu reeves"),
+        (8, "Carrie-Anne Moss", "carrie-anne moss"),
+    ]
+    assert list(result.edge_rows()) == [(9499, 7), (9499, 8), (1, 7)]
+
+
+def test_crawl_is_persisted(stub_test_client: TestClient) -> None:
+    response = stub_test_client.post(
+        "/crawl/load_movies_data", params={"pages_to_crawl": 2}
+    )
+    assert response.status_code == 204
+
+    rank = MOVIES_PER_PAGE + 1  # first movie of the second page
+    movie_result = stub_test_client.get(f"/movie/{stub_movie_id(rank)}")
+    assert movie_result.status_code == 200
+    movie = MovieWithActors.model_validate(movie_result.json())
+    assert movie.movie.title == stub_movie_title(rank)
+    assert movie.movie.rank == rank
+    assert len(movie.actors) == ACTORS_PER_MOVIE
+    assert {actor.name for actor in movie.actors} == {
+        stub_actor_name(actor_id) for actor_id in stub_actor_ids(rank)
+    }
@@ -0,0 +1,98 @@
+import asyncio
+import sqlite3
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app.db import create_db_context
+from app.models import Movie
+from app.models.movie__actor import MovieActor
+
+# The schema before deep crawls, when every movie had to have a rank
+_SCHEMA_WITH_REQUIRED_RANK = """
+CREATE TABLE movies (
+    id INTEGER NOT NULL,
+    title VARCHAR NOT NULL,
+    normalized_title VARCHAR NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE TABLE actors (
+    id INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    normalized_name VARCHAR NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE TABLE movies__actors (
+    movie_id INTEGER NOT NULL,
+    actor_id INTEGER NOT NULL,
+    PRIMARY KEY (movie_id, actor_id),
+    FOREIGN KEY(movie_id) REFERENCES movies (id),
+    FOREIGN KEY(actor_id) REFERENCES actors (id)
+);
+INSERT INTO movies VALUES (2294, 'Pelíšky', 'pelisky', 1), (9499, 'Matrix', 'matrix', 2);
+INSERT INTO actors VALUES (7, 'Keanu Reeves', 'keanu reeves');
+INSERT INTO movies__actors VALUES (9499, 7);
+"""
+
+
+def _old_database(path: Path) -> None:
+    with sqlite3.connect(path) as connection:
+        connection.executescript(_SCHEMA_WITH_REQUIRED_RANK)
+    connection.close()
+
+
+def test_rank_becomes_nullable(tmp_path: Path) -> None:
+    db_path = tmp_path / "crawled.db"
+    _old_database(db_path)
+
+    async def start_and_read() -> tuple[list[tuple[int, str, int | None]], list[int]]:
+        async with create_db_context(db_path) as db_context:
+            async with db_context.get_session(auto_commit=True) as session:
+                session.add(
+                    Movie(id=1, title="Deep", normalized_title="deep", rank=None)
+                )
+            async with db_context.get_session() as session:
+                movies = (
+                    await session.execute(
+                        select(Movie.id, Movie.title, Movie.rank).order_by(Movie.id)
+                    )
+                ).tuples()
+                edges = (await session.execute(select(MovieActor.movie_id))).scalars()
+                return list(movies), list(edges)
+
+    movies, edges = asyncio.run(start_and_read())
+
+    assert movies == [(1, "Deep", None), (2294, "Pelíšky", 1), (9499, "Matrix", 2)]
+    assert edges == [9499]
+    with sqlite3.connect(db_path) as connection:
+        foreign_keys = connection.execute(
+            "PRAGMA foreign_key_list(movies__actors)"
+        ).fetchall()
+        tables = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).fetchall()
+    connection.close()
+    # (id, seq, table, from, to, ...)
+    assert {(fk[2], fk[3]) for fk in foreign_keys} == {
+        ("movies", "movie_id"),
+        ("actors", "actor_id"),
+    }
+    assert ("movies_before_migration",) not in tables
+
+
+def test_workers_starting_at_once_migrate_once(tmp_path: Path) -> None:
+    db_path = tmp_path / "crawled.db"
+    _old_database(db_path)
+
+    async def start() -> int:
+        async with (
+            create_db_context(db_path) as db_context,
+            db_context.get_session() as session,
+        ):
+            return len((await session.execute(select(Movie.id))).all())
+
+    async def start_workers() -> list[int]:
+        return await asyncio.gather(*(start() for _ in range(4)))
+
+    assert asyncio.run(start_workers()) == [2, 2, 2, 2]
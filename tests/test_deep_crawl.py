@@ -0,0 +1,81 @@
+import re
+
+from conftest import (
+    DEEP_RANK_OFFSET,
+    StubCsfd,
+    stub_actor_ids,
+    stub_directed,
+    stub_filmography,
+    stub_movie_id,
+    stub_movie_title,
+)
+from fastapi.testclient import TestClient
+
+from app.schemas import MovieWithActors
+from app.scraper.frontier import IdSet
+
+CRAWL = "/crawl/load_movies_data"
+TOP_MOVIES = range(1, 6)  # the first page of the stub
+
+
+def _requested_actors(stub_csfd: StubCsfd) -> list[int]:
+    return [
+        int(match.group(1))
+        for path in stub_csfd.requested_paths
+        if (match := re.fullmatch(r"/tvurce/(\d+)-.*", path))
+    ]
+
+
+def test_deep_crawl_follows_filmographies(
+    stub_test_client: TestClient, stub_csfd: StubCsfd
+) -> None:
+    response = stub_test_client.post(CRAWL, params={"deep_crawl_depth": 1})
+    assert response.status_code == 204
+
+    actors = {actor_id for rank in TOP_MOVIES for actor_id in stub_actor_ids(rank)}
+    requested_actors = _requested_actors(stub_csfd)
+    assert sorted(requested_actors) == sorted(actors)
+
+    for actor_id in actors:
+        for rank in stub_filmography(actor_id):
+            movie = MovieWithActors.model_validate(
+                stub_test_client.get(f"/movie/{stub_movie_id(rank)}").json()
+            )
+            assert movie.movie.title == stub_movie_title(rank)
+            assert movie.movie.rank == (rank if rank in TOP_MOVIES else None)
+            assert {actor.id for actor in movie.actors} == set(stub_actor_ids(rank))
+        director_only = stub_test_client.get(
+            f"/movie/{stub_movie_id(stub_directed(actor_id))}"
+        )
+        assert director_only.status_code == 404
+
+    # Each movie page is visited once, even if linked from several filmographies
+    movie_paths = [path for path in stub_csfd.requested_paths if "/film/" in path]
+    assert len(movie_paths) == len(set(movie_paths))
+
+
+def test_deep_crawl_prefers_most_linked_pages(
+    stub_test_client: TestClient, stub_csfd: StubCsfd
+) -> None:
+    response = stub_test_client.post(
+        CRAWL, params={"deep_crawl_depth": 2, "deep_crawl_page_budget": 3}
+    )
+    assert response.status_code == 204
+
+    # Actors 4, 5 and 6 play in three of the top movies each, the others in fewer
+    assert sorted(_requested_actors(stub_csfd)) == [4, 5, 6]
+    # The budget is spent, no movie beyond the top ones was visited
+    assert not any(
+        f"/film/{stub_movie_id(DEEP_RANK_OFFSET + actor_id)}-" in path
+        for actor_id in (4, 5, 6)
+        for path in stub_csfd.requested_paths
+    )
+
+
+def test_id_set() -> None:
+    ids = IdSet()
+    for id_ in (0, 7, 8, 1_234_567):
+        ids.add(id_)
+
+    assert all(id_ in ids for id_ in (0, 7, 8, 1_234_567))
+    assert not any(id_ in ids for id_ in (1, 9, 1_234_566, 10_000_000))
@@ -0,0 +1,62 @@
+from conftest import ACTORS_PER_MOVIE, stub_actor_ids, stub_movie_id
+from fastapi.testclient import TestClient
+
+MOVIE_FIELDS = {"title", "rank", "id"}
+
+
+def _crawl(client: TestClient) -> None:
+    response = client.post("/crawl/load_movies_data", params={"pages_to_crawl": 2})
+    assert response.status_code == 204
+
+
+def test_default_responses_are_unchanged(stub_test_client: TestClient) -> None:
+    _crawl(stub_test_client)
+
+    movie = stub_test_client.get(f"/movie/{stub_movie_id(1)}").json()
+    assert movie.keys() == {"movie", "actors"}
+    assert movie["movie"].keys() == MOVIE_FIELDS
+    assert movie["actors"][0].keys() == {"name", "id"}
+
+    search = stub_test_client.get("/search", params={"query": "kůň 1"}).json()
+    assert search.keys() == {"movies", "actors"}
+
+
+def test_counts_instead_of_lists(stub_test_client: TestClient) -> None:
+    _crawl(stub_test_client)
+
+    movie = stub_test_client.get(
+        f"/movie/{stub_movie_id(1)}", params={"include": "actors.count"}
+    ).json()
+    assert movie == {
+        "movie": {
+            "title": movie["movie"]["title"],
+            "rank": 1,
+            "id": stub_movie_id(1),
+            "actor_count": ACTORS_PER_MOVIE,
+        }
+    }
+
+    actor_id = stub_actor_ids(1)[0]
+    actor = stub_test_client.get(
+        f"/actor/{actor_id}", params={"include": "movies,movies.count"}
+    ).json()
+    assert actor["actor"]["movie_count"] == len(actor["movies"]) > 0
+
+    bare = stub_test_client.get(f"/actor/{actor_id}", params={"include": ""}).json()
+    assert bare.keys() == {"actor"}
+
+
+def test_search_with_counts(stub_test_client: TestClient) -> None:
+    _crawl(stub_test_client)
+
+    search = stub_test_client.get(
+        "/search", params={"query": "kůň", "include": "movies.actors.count"}
+    ).json()
+    assert search.keys() == {"movies"}
+    assert len(search["movies"]) == 10
+    assert all(movie["actor_count"] == ACTORS_PER_MOVIE for movie in search["movies"])
+
+    response = stub_test_client.get(
+        "/search", params={"query": "kůň", "include": "movies.title"}
+    )
+    assert response.status_code == 422
@@ -0,0 +1,84 @@
+import asyncio
+import pstats
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.db import create_db_context
+from app.instrumentation import ProfilingMiddleware, RequestContextMiddleware
+from app.logger import logger
+from app.models import Movie
+
+
+def test_slow_query_log_includes_plan() -> None:
+    records: list[dict[str, Any]] = []
+    sink = logger.add(
+        lambda message: records.append(message.record["extra"]),
+        filter=lambda record: record["message"] == "Slow query",
+    )
+
+    async def query() -> None:
+        async with (
+            create_db_context(":memory:", slow_query_ms=0) as db_context,
+            db_context.get_session() as session,
+        ):
+            await session.execute(select(Movie).where(Movie.id == 1))
+
+    try:
+        asyncio.run(query())
+    finally:
+        logger.remove(sink)
+
+    select_record = next(r for r in records if "FROM movies" in r["statement"])
+    assert select_record["parameters"] == (1,)
+    assert any("movies" in step for step in select_record["plan"])
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping() -> str:  # pyright: ignore[reportUnusedFunction]
+        logger.info("Ping")
+        return "pong"
+
+    return app
+
+
+def test_request_id_is_logged_and_returned() -> None:
+    request_ids: list[str] = []
+    sink = logger.add(
+        lambda message: request_ids.append(message.record["extra"]["request_id"]),
+        filter=lambda record: record["message"] == "Ping",
+    )
+    app = _app()
+    app.add_middleware(RequestContextMiddleware)
+
+    try:
+        with TestClient(app) as client:
+            given = client.get("/ping", headers={"X-Request-ID": "abc"})
+            generated = client.get("/ping")
+    finally:
+        logger.remove(sink)
+
+    assert given.headers["x-request-id"] == "abc"
+    assert generated.headers["x-request-id"]
+    assert request_ids == ["abc", generated.headers["x-request-id"]]
+
+
+def test_profile_is_written_only_when_asked(tmp_path: Path) -> None:
+    app = _app()
+    app.add_middleware(ProfilingMiddleware, profile_dir=tmp_path)
+
+    with TestClient(app) as client:
+        client.get("/ping")
+        client.get("/ping", headers={"X-Profile": "0"})
+        assert not list(tmp_path.iterdir())
+        client.get("/ping", headers={"X-Profile": "1"})
+
+    (profile,) = tmp_path.glob("*-GET-ping.prof")
+    stats = pstats.Stats(str(profile)).get_stats_profile()
+    assert any(name.startswith("ping") for name in stats.func_profiles)
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import bindparam, event, func, select
+from sqlalchemy.pool import Pool
+
+from app.db import create_db_context
+from app.load_data import persist_movies_and_actors
+from app.models import Actor, Movie
+from app.scraper.schemas import ActorInfo, CrawlResult
+
+MOVIES = 200
+SEARCHES = 50
+
+
+def _catalogue() -> CrawlResult:
+    result = CrawlResult()
+    for rank in range(1, MOVIES + 1):
+        movie_idx = result.add_movie(rank, f"Movie {rank}", rank)
+        result.add_cast(
+            movie_idx,
+            [
+                ActorInfo(name=f"Actor {rank * 10 + i}", id=rank * 10 + i)
+                for i in range(3)
+            ],
+        )
+    return result
+
+
+def test_parallel_queries_under_load(tmp_path: Path) -> None:
+    movies_stmt = select(Movie.id).where(Movie.title.like(bindparam("pattern")))
+    actors_stmt = select(Actor.id).where(Actor.name.like(bindparam("pattern")))
+
+    async def stress() -> list[tuple[list[int], list[int]]]:
+        async with create_db_context(tmp_path / "parallel.db") as db_context:
+            await persist_movies_and_actors(db_context, _catalogue())
+
+            async def search(i: int) -> tuple[list[int], list[int]]:
+                movies, actors = await db_context.execute_parallel(
+                    movies_stmt, actors_stmt, params={"pattern": f"% {i}%"}
+                )
+                assert movies is not None
+                assert actors is not None
+                return list(movies.scalars()), list(actors.scalars())
+
+            results = await asyncio.gather(*(search(i) for i in range(SEARCHES)))
+
+            skipped = await db_context.execute_parallel(
+                None, select(func.count()).select_from(Movie)
+            )
+            assert skipped[0] is None
+            assert skipped[1] is not None
+            assert skipped[1].scalar_one() == MOVIES
+            return results
+
+    for i, (movie_ids, actor_ids) in enumerate(asyncio.run(stress())):
+        assert movie_ids == [
+            rank for rank in range(1, MOVIES + 1) if str(rank).startswith(str(i))
+        ]
+        assert actor_ids == [
+            actor_id
+            for actor_id in range(10, (MOVIES + 1) * 10)
+            if actor_id % 10 < 3 and str(actor_id).startswith(str(i))
+        ]
+
+
+def test_statements_of_one_call_overlap(tmp_path: Path) -> None:
+    # Each statement waits inside SQLite until the other one is running as well,
+    # which they only can on separate connections (each with its own thread)
+    both_running = threading.Barrier(2, timeout=5)
+
+    def register_function(dbapi_connection: Any, _connection_record: Any) -> None:  # noqa: ANN401
+        dbapi_connection.create_function(
+            "wait_for_other_statement", 0, both_running.wait
+        )
+
+    async def run() -> list[int]:
+        async with create_db_context(tmp_path / "parallel.db") as db_context:
+            results = await db_context.execute_parallel(
+                select(func.wait_for_other_statement()),
+                select(func.wait_for_other_statement()),
+            )
+            return [result.scalar_one() for result in results if result is not None]
+
+    event.listen(Pool, "connect", register_function)
+    try:
+        # `Barrier.wait` returns a different index to each waiting thread
+        assert sorted(asyncio.run(run())) == [0, 1]
+    finally:
+        event.remove(Pool, "connect", register_function)
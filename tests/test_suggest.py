@@ -0,0 +1,116 @@
+import random
+from collections.abc import Sequence
+
+import pytest
+from conftest import MOVIES_PER_PAGE, stub_movie_id, stub_movie_title
+from fastapi.testclient import TestClient
+
+import app.suggest
+from app.suggest import PRECOMPUTED_ABOVE, SuggestEntry, SuggestIndex
+from app.utils import normalize_text
+
+
+def _entry(name: str, score: int, id_: int) -> SuggestEntry:
+    return normalize_text(name), score, id_, name
+
+
+def test_prefixes_and_typos() -> None:
+    index = SuggestIndex(
+        [
+            _entry("Matrix", 3, 1),
+            _entry("Matrix Reloaded", 2, 2),
+            _entry("Pelíšky", 1, 3),
+            _entry("Mattoni", 4, 4),
+        ]
+    )
+
+    def names(query: str, limit: int = 10) -> list[str]:
+        return [suggestion.name for suggestion in index.suggest(query, limit)]
+
+    assert names("MAT", limit=2) == ["Matrix Reloaded", "Matrix"]
+    assert names("pelis") == ["Pelíšky"]
+    # Missing, replaced, added and swapped characters, exact matches first
+    assert names("matix") == ["Matrix Reloaded", "Matrix"]
+    assert names("matrox") == ["Matrix Reloaded", "Matrix"]
+    assert names("mattrix") == ["Matrix Reloaded", "Matrix"]
+    assert names("amtrix") == ["Matrix Reloaded", "Matrix"]
+    assert names("matt") == ["Mattoni", "Matrix Reloaded", "Matrix"]
+    # Too short for typos
+    assert names("pa") == []
+    assert SuggestIndex([]).suggest("matrix", 10) == []
+
+
+def test_precomputed_prefixes_match_a_scan() -> None:
+    rng = random.Random(42)  # noqa: S311
+    entries = [
+        _entry("".join(rng.choices("abc", k=rng.randint(1, 8))), rng.randrange(50), id_)
+        for id_ in range(PRECOMPUTED_ABOVE * 20)
+    ]
+    index = SuggestIndex(entries)
+
+    for prefix in ("a", "ab", "abc", "cab", "bbbb"):
+        expected = sorted(
+            (score, key, id_)
+            for key, score, id_, _ in entries
+            if key.startswith(prefix)
+        )[:10]
+        assert [suggestion.score for suggestion in index.suggest(prefix, 10)] == [
+            score for score, _, _ in expected
+        ]
+
+
+def test_suggest_endpoint(stub_test_client: TestClient) -> None:
+    response = stub_test_client.post(
+        "/crawl/load_movies_data", params={"pages_to_crawl": 2}
+    )
+    assert response.status_code == 204
+
+    suggestions = stub_test_client.get(
+        "/suggest", params={"q": "zlutoucky", "limit": 3}
+    ).json()
+    assert suggestions["movies"] == [
+        {"title": stub_movie_title(rank), "rank": rank, "id": stub_movie_id(rank)}
+        for rank in (1, 2, 3)
+    ]
+    assert suggestions["actors"] == []
+
+    actors = stub_test_client.get("/suggest", params={"q": "Herec"}).json()["actors"]
+    assert len(actors) == 10
+    assert actors[0].keys() == {"name", "id"}
+
+    response = stub_test_client.get("/suggest", params={"q": "kun", "limit": 1000})
+    assert response.status_code == 422
+
+
+def test_no_stale_suggestions_cached_during_rebuild(
+    stub_test_client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    gzip = {"Accept-Encoding": "gzip"}
+    params = {"q": "zlu", "limit": 20}
+    response = stub_test_client.post(
+        "/crawl/load_movies_data", params={"pages_to_crawl": 4}
+    )
+    assert response.status_code == 204
+
+    during_rebuild: list[int] = []
+
+    def build_indexes(
+        movies: Sequence[SuggestEntry], actors: Sequence[SuggestEntry]
+    ) -> tuple[SuggestIndex, SuggestIndex]:
+        # Runs in a worker thread, so the app is free to answer meanwhile
+        response = stub_test_client.get("/suggest", params=params, headers=gzip)
+        assert response.headers["content-encoding"] == "gzip"
+        during_rebuild.append(len(response.json()["movies"]))
+        return SuggestIndex(movies), SuggestIndex(actors)
+
+    monkeypatch.setattr(app.suggest, "_build_indexes", build_indexes)
+    response = stub_test_client.post(
+        "/crawl/load_movies_data", params={"pages_to_crawl": 1}
+    )
+    assert response.status_code == 204
+
+    # Answered from the previous catalogue, but not cached past the rebuild
+    assert during_rebuild == [4 * MOVIES_PER_PAGE]
+    for headers in (gzip, {"Accept-Encoding": "identity"}):
+        response = stub_test_client.get("/suggest", params=params, headers=headers)
+        assert len(response.json()["movies"]) == MOVIES_PER_PAGE
@@ -0,0 +1,64 @@
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main
+from app.scraper.schemas import ActorInfo, CrawlResult
+from app.snapshot import load_snapshot, write_snapshot
+from app.warmup import hot_paths
+
+
+def test_snapshot_round_trip(tmp_path: Path) -> None:
+    result = CrawlResult()
+    matrix = result.add_movie(9499, "Matrix", 2)
+    pelisky = result.add_movie(2294, "Pelíšky", 1)
+    result.add_cast(matrix, [ActorInfo(name="Keanu Reeves", id=7)])
+    result.add_cast(
+        pelisky,
+        [ActorInfo(name="Jiří Kodet", id=8), ActorInfo(name="Keanu Reeves", id=7)],
+    )
+
+    path = tmp_path / "crawled.db.snapshot"
+    write_snapshot(path, result)
+    snapshot = load_snapshot(path)
+
+    assert snapshot is not None
+    assert list(snapshot.movie_ids) == [9499, 2294]
+    assert list(snapshot.movie_ranks) == [2, 1]
+    assert [snapshot.movie_title(0), snapshot.movie_title(1)] == ["Matrix", "Pelíšky"]
+    assert [snapshot.actor_name(0), snapshot.actor_name(1)] == [
+        "Keanu Reeves",
+        "Jiří Kodet",
+    ]
+    assert list(snapshot.edges) == list(result.edges)
+    assert hot_paths(snapshot, 1) == ["/movie/2294", "/actor/7"]
+
+
+def test_missing_or_broken_snapshot(tmp_path: Path) -> None:
+    path = tmp_path / "crawled.db.snapshot"
+    assert load_snapshot(path) is None
+    path.write_bytes(b"garbage")
+    assert load_snapshot(path) is None
+
+    result = CrawlResult()
+    matrix = result.add_movie(9499, "Matrix", 2)
+    result.add_cast(matrix, [ActorInfo(name="Keanu Reeves", id=7)])
+    write_snapshot(path, result)
+    complete = path.read_bytes()
+    assert load_snapshot(path) is not None
+    # Cut off within the arrays, and within the names
+    for size in (100, len(complete) - 1):
+        path.write_bytes(complete[:size])
+        assert load_snapshot(path) is None
+
+
+def test_ready_after_warm_up(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(app.main, "WARM_START", True)
+
+    with TestClient(app.main.app) as client:
+        deadline = time.monotonic() + 5
+        while client.get("/ready").status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client.get("/ready").status_code == 200